@@ -1,9 +1,29 @@
-from django.test import TestCase
+import os
+import tempfile
+
+from django.test import RequestFactory, TestCase
 from http import HTTPStatus
 
+from .views import serve_immutable
+
 
 class ViewTestClass(TestCase):
     def test_error_page(self):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+    def test_only_content_names_are_immutable(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        hashed = 'ab/ab' + '0' * 62 + '.jpg'
+        for name in (hashed, 'legacy.jpg'):
+            os.makedirs(
+                os.path.join(root.name, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(root.name, name), 'wb') as file:
+                file.write(b'jpeg')
+        request = RequestFactory().get('/media/posts/')
+        response = serve_immutable(request, hashed, root.name)
+        self.assertIn('immutable', response['Cache-Control'])
+        response = serve_immutable(request, 'legacy.jpg', root.name)
+        self.assertFalse(response.has_header('Cache-Control'))
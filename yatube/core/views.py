@@ -1,4 +1,12 @@
+import re
+
 from django.shortcuts import render
+from django.views.static import serve
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# <2 знака хеша>/<SHA-256><расширение>, как у ContentAddressedStorage
+CONTENT_NAME = re.compile(
+    r'(?P<prefix>[0-9a-f]{2})/(?P=prefix)[0-9a-f]{62}(\.[0-9a-z]+)?')
 
 
 def page_not_found(request, exception):
@@ -17,3 +25,13 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def serve_immutable(request, path, document_root=None):
+    response = serve(request, path, document_root=document_root)
+    # Неизменны только файлы с именем по хешу содержимого; старые
+    # загрузки под исходными именами могут быть перезаписаны
+    if CONTENT_NAME.fullmatch(path):
+        response['Cache-Control'] = (
+            f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+    return response
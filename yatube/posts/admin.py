@@ -1,17 +1,115 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db.models.expressions import RawSQL
 
 from .models import Comment, Follow, Group, Post
+from .paginators import CachedCountPaginator
+from .regroup import move_posts
+from .search import (comment_ids_matching, fts_available, match_expression,
+                     post_ids_matching)
 
 
-class PostAdmin(admin.ModelAdmin):
+class ScalableChangeListMixin:
+    """Список объектов, не считающий COUNT(*) по всей таблице.
+
+    Общее число строк не выводится, а число найденных берётся из кеша
+    счётчиков с поколениями count_generations; для больших
+    нефильтрованных таблиц - оценка по статистике СУБД.
+    """
+    count_generations = ()
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return CachedCountPaginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            generations=self.count_generations, approximate=True)
+
+
+class FullTextSearchMixin:
+    """Поиск в админке по индексу FTS5 вместо LIKE '%...%' по таблице.
+
+    ids_matching - функция из posts.search, возвращающая подзапрос id.
+    """
+    ids_matching = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not fts_available() or not match_expression(search_term):
+            return super().get_search_results(
+                request, queryset, search_term)
+        return queryset.filter(
+            pk__in=RawSQL(*self.ids_matching(search_term))), False
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа')
+
+
+class PostAdmin(ScalableChangeListMixin, FullTextSearchMixin,
+                admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
     empty_value_display = ('-пусто-')
+    count_generations = ('posts',)
+    ids_matching = staticmethod(post_ids_matching)
+    action_form = PostActionForm
+    actions = ('move_to_group', 'remove_from_group')
+
+    def _move(self, request, queryset, group):
+        moved = sum(move_posts(
+            queryset, group and group.pk, settings.POST_REGROUP_CHUNK_SIZE))
+        self.message_user(request, f'Перенесено постов: {moved}')
+
+    def move_to_group(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        if not form.is_valid() or form.cleaned_data['group'] is None:
+            self.message_user(
+                request, 'Выберите группу.', level=messages.WARNING)
+            return
+        self._move(request, queryset, form.cleaned_data['group'])
+    move_to_group.short_description = 'Перенести в выбранную группу'
+
+    def remove_from_group(self, request, queryset):
+        self._move(request, queryset, None)
+    remove_from_group.short_description = 'Убрать из группы'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'posts_count')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class CommentAdmin(ScalableChangeListMixin, FullTextSearchMixin,
+                   admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    date_hierarchy = 'created'
+    autocomplete_fields = ('author',)
+    # Постов слишком много даже для поиска по первым буквам
+    raw_id_fields = ('post',)
+    count_generations = ('comments',)
+    ids_matching = staticmethod(comment_ids_matching)
+
+
+class FollowAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
+    autocomplete_fields = ('user', 'author')
+    count_generations = ('follows',)
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
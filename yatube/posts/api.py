@@ -0,0 +1,197 @@
+"""JSON-версии лент и страницы поста для мобильных клиентов.
+
+Ответы собираются из словарей values() без моделей и шаблонов. Поля
+выбираются параметром ?fields=id,text,..., страницы листаются курсором
+?after= по ключу (дата, id), размер страницы - ?limit= не больше
+API_MAX_LIMIT. ETag тот же, что у HTML-версий страниц.
+"""
+import json
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from . import views
+from .cache import cached_lookup
+from .models import Comment, Group, Post, User
+from .paginators import InvalidCursor, decode_cursor, encode_cursor, keyset
+from .storage import post_image_storage
+from .timeline import FollowFeed
+
+# Имя поля в ответе -> путь для values()
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _json(data, status=200):
+    return HttpResponse(
+        json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                   default=_default),
+        content_type='application/json', status=status)
+
+
+def api_view(view):
+    """Отдаёт словарь, возвращённый view, как JSON; ApiError - как ошибку."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return _json(view(request, *args, **kwargs))
+        except ApiError as error:
+            return _json({'detail': error.detail}, error.status)
+    return require_GET(wrapper)
+
+
+def _fields(request, available, param='fields'):
+    requested = request.GET.get(param)
+    if not requested:
+        return list(available)
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = sorted(set(names) - set(available))
+    if unknown:
+        raise ApiError(400, 'Неизвестные поля: {}'.format(', '.join(unknown)))
+    return names
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.MAX_RECORDS_PER_PAGE))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    return min(max(limit, 1), settings.API_MAX_LIMIT)
+
+
+def _after(request):
+    token = request.GET.get('after')
+    if not token:
+        return None
+    try:
+        return decode_cursor(token)
+    except InvalidCursor:
+        raise ApiError(400, 'Неверный курсор.')
+
+
+def _serialize(row, names, fields):
+    item = {name: row[fields[name]] for name in names}
+    if 'image' in item:
+        item['image'] = item['image'] and post_image_storage.url(
+            item['image']) or None
+    return item
+
+
+def _page(request, queryset, fields=POST_FIELDS, date_field='pub_date',
+          prefix=''):
+    """Страница values()-строк после курсора и курсор следующей."""
+    names = _fields(request, fields, f'{prefix}fields')
+    limit = _limit(request)
+    paths = {fields[name] for name in names} | {'id', date_field}
+    rows = list(
+        keyset(queryset, _after(request), date_field=date_field)
+        .values(*paths)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][date_field], rows[-1]['id'])
+    return {
+        'results': [_serialize(row, names, fields) for row in rows],
+        'next': next_cursor,
+    }
+
+
+def _lookup(kind, value, queryset):
+    pk = cached_lookup(kind, value, lambda: queryset.values_list(
+        'pk', flat=True).first())
+    if pk is None:
+        raise ApiError(404, 'Не найдено.')
+    return pk
+
+
+@condition(etag_func=views.index_etag)
+@api_view
+def index(request):
+    return _page(request, Post.objects.all())
+
+
+@condition(etag_func=views.group_etag)
+@api_view
+def group_posts(request, slug):
+    group_id = _lookup('group', slug, Group.objects.filter(slug=slug))
+    return _page(request, Post.objects.filter(group_id=group_id))
+
+
+@condition(etag_func=views.profile_etag)
+@api_view
+def profile(request, username):
+    user_id = _lookup('user', username, User.objects.filter(
+        username=username))
+    return _page(request, Post.objects.filter(author_id=user_id))
+
+
+@condition(etag_func=views.follow_etag)
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужно войти.')
+    names = _fields(request, POST_FIELDS)
+    limit = _limit(request)
+    keys = FollowFeed(request.user).seek_keys(
+        _after(request), False, limit + 1)
+    next_cursor = None
+    if len(keys) > limit:
+        keys = keys[:limit]
+        next_cursor = encode_cursor(*keys[-1])
+    paths = {POST_FIELDS[name] for name in names} | {'id'}
+    rows = {
+        row['id']: row for row in Post.objects.filter(
+            pk__in=[pk for _, pk in keys]).values(*paths)}
+    return {
+        'results': [
+            _serialize(rows[pk], names, POST_FIELDS)
+            for _, pk in keys if pk in rows],
+        'next': next_cursor,
+    }
+
+
+@condition(etag_func=views.post_etag)
+@api_view
+def post_detail(request, post_id):
+    names = _fields(request, POST_FIELDS)
+    row = Post.objects.filter(pk=post_id).values(
+        *{POST_FIELDS[name] for name in names}).first()
+    if row is None:
+        raise ApiError(404, 'Не найдено.')
+    comments = _page(
+        request, Comment.objects.filter(post_id=post_id),
+        fields=COMMENT_FIELDS, date_field='created', prefix='comment_')
+    return {
+        'post': _serialize(row, names, POST_FIELDS),
+        'comments': comments['results'],
+        'next': comments['next'],
+    }
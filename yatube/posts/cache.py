@@ -0,0 +1,196 @@
+import hashlib
+import math
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+
+GENERATION_KEY = 'posts:generation:{}'
+COUNT_KEY = 'posts:count:{}:{}'
+PAGE_PARAMS = ('page', 'after', 'before')
+ANONYMOUS_PAGE_KEY = 'posts:page:{}'
+LOOKUP_KEY = 'posts:lookup:{}:{}'
+MODIFIED_KEY = 'posts:modified:{}'
+
+
+def _generation_keys(names):
+    return [GENERATION_KEY.format(name) for name in names]
+
+
+def get_generations(*names):
+    """Текущие номера поколений для перечисленных имён.
+
+    Поколение, которого ещё нет в кеше, начинается с отметки времени,
+    чтобы после вытеснения ключа не совпасть со старым значением.
+    """
+    keys = _generation_keys(names)
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def bump_generation(*names):
+    """Сдвигает поколения, делая недействительными зависящие от них ключи."""
+    for key in _generation_keys(names):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    _touch(names)
+
+
+def _touch(names):
+    # Last-Modified точен до секунды: каждое изменение сдвигает отметку
+    # хотя бы на секунду, иначе два изменения за одну секунду дали бы
+    # одинаковый заголовок и опрос с If-Modified-Since получил бы 304
+    now = math.ceil(time.time())
+    keys = [MODIFIED_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    cache.set_many(
+        {key: max(now, found.get(key, 0) + 1) for key in keys}, None)
+
+
+def last_modified(name):
+    """Время последнего сдвига поколения name.
+
+    Если отметки ещё нет (или она вытеснена), изменением считается
+    текущий момент.
+    """
+    key = MODIFIED_KEY.format(name)
+    cache.add(key, math.ceil(time.time()), None)
+    return datetime.fromtimestamp(cache.get(key), timezone.utc)
+
+
+def queryset_fingerprint(queryset):
+    """Ключ формы запроса: одинаковые запросы дают одинаковый ключ."""
+    sql = str(queryset.query).encode()
+    return hashlib.md5(sql).hexdigest()
+
+
+def cached_count(queryset, generations=('posts',)):
+    """COUNT(*) по queryset из кеша с TTL и сбросом по поколениям."""
+    try:
+        fingerprint = queryset_fingerprint(queryset)
+    except EmptyResultSet:
+        return 0
+    key = COUNT_KEY.format(
+        '.'.join(map(str, get_generations(*generations))), fingerprint)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.FEED_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def post_scopes(author_id, *group_ids, post_id=None):
+    """Поколения страниц, на которых виден пост автора из данных групп."""
+    scopes = ['feed', f'author:{author_id}']
+    scopes.extend(f'group:{group_id}' for group_id in group_ids if group_id)
+    if post_id is not None:
+        scopes.append(f'post:{post_id}')
+    return scopes
+
+
+def feed_fragment(request, *scopes):
+    """Параметры тега {% cache %} для фрагмента ленты.
+
+    Ключ включает страницу (номер или курсор) и поколения scopes, поэтому
+    фрагмент сбрасывается сразу при изменении постов, а не по TTL.
+    """
+    page = [request.GET.get(param, '') for param in PAGE_PARAMS]
+    generations = get_generations(*scopes)
+    return {
+        'timeout': settings.FEED_FRAGMENT_CACHE_TIMEOUT,
+        'key': ':'.join(map(str, (*page, *generations))),
+    }
+
+
+def tag_page(request, *tags):
+    """Помечает ответ тегами для кеша страниц анонимных посетителей.
+
+    Поколения тегов запоминаются до выполнения запросов к БД, поэтому
+    изменение, случившееся во время рендеринга, не попадёт в кеш под
+    новым поколением.
+    """
+    request.page_cache_tags = tags
+    request.page_cache_generations = get_generations(*tags)
+
+
+def cache_anonymous_page(view):
+    """Кеширует целиком GET-ответы view для неавторизованных запросов.
+
+    Ответ хранится вместе с тегами (см. tag_page) и отдаётся, пока ни одно
+    из поколений этих тегов не сдвинулось; сброс - bump_generation(tag).
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        path = request.get_full_path().encode()
+        key = ANONYMOUS_PAGE_KEY.format(hashlib.md5(path).hexdigest())
+        entry = cache.get(key)
+        if entry is not None:
+            tags, generations, response = entry
+            if get_generations(*tags) == generations:
+                return response
+        response = view(request, *args, **kwargs)
+        tags = getattr(request, 'page_cache_tags', None)
+        if tags and response.status_code == 200 and not response.cookies:
+            cache.set(
+                key,
+                (tags, request.page_cache_generations, response),
+                settings.ANONYMOUS_PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+def _lookup_key(kind, value):
+    digest = hashlib.md5(str(value).encode()).hexdigest()
+    return LOOKUP_KEY.format(kind, digest)
+
+
+def cached_lookup(kind, value, loader):
+    """Кеширует соответствие, например slug -> id группы.
+
+    Ключ нужно удалять forget_lookup() при переименовании и удалении
+    объекта: иначе старый slug продолжит указывать на переименованную
+    группу, а новая группа с этим slug получит чужой ETag.
+    """
+    key = _lookup_key(kind, value)
+    result = cache.get(key)
+    if result is None:
+        result = loader()
+        if result is not None:
+            cache.set(key, result, settings.LOOKUP_CACHE_TIMEOUT)
+    return result
+
+
+def forget_lookup(kind, *values):
+    """Удаляет закешированные соответствия для значений values."""
+    cache.delete_many([
+        _lookup_key(kind, value) for value in values if value is not None])
+
+
+def page_etag(request, *tags):
+    """ETag страницы по поколениям её тегов без запросов к постам.
+
+    Учитывает адрес со строкой запроса, пользователя и CSRF-cookie, так как
+    от них зависит разметка для авторизованных пользователей.
+    """
+    user = request.user
+    parts = (
+        request.get_full_path(),
+        user.pk if user.is_authenticated else '',
+        user.get_username(),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        *get_generations(*tags),
+    )
+    raw = '|'.join(map(str, parts)).encode()
+    return hashlib.md5(raw).hexdigest()
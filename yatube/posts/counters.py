@@ -0,0 +1,109 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются выражениями F() в обработчиках сигналов, поэтому
+конкурирующие запросы не теряют обновления, а сверка с реальными
+данными выполняется командой reconcile_counters.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, UserStats
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def _count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field)
+        .annotate(total=Count('pk')).values('total')), 0)
+
+
+def real_user_counts(user_id):
+    return {
+        name: model.objects.filter(**{f'{field}_id': user_id}).count()
+        for name, (model, field) in USER_COUNTERS.items()
+    }
+
+
+def get_user_stats(user):
+    """Счётчики пользователя; строка создаётся по реальным данным."""
+    stats = UserStats.objects.filter(user=user).first()
+    if stats is None:
+        stats, _ = UserStats.objects.get_or_create(
+            user=user, defaults=real_user_counts(user.pk))
+    return stats
+
+
+def change(model, pk, field, delta):
+    """Атомарно сдвигает счётчик field у строки model с ключом pk."""
+    if pk is None:
+        return 0
+    rows = model.objects.filter(pk=pk)
+    if delta < 0:
+        # Разошедшийся счётчик не уходит в минус; его поправит сверка
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    return rows.update(**{field: F(field) + delta})
+
+
+def change_user(user_id, field, delta):
+    if not change(UserStats, user_id, field, delta):
+        # Строки ещё нет: создаём её сразу с реальными значениями
+        UserStats.objects.get_or_create(
+            user_id=user_id, defaults=real_user_counts(user_id))
+
+
+RECONCILE = {
+    'posts': (Post, {'comments_count': (Comment, 'post')}),
+    'groups': (Group, {'posts_count': (Post, 'group')}),
+    'users': (UserStats, {
+        name: (model, field)
+        for name, (model, field) in USER_COUNTERS.items()}),
+}
+
+
+def reconcile(name, chunk_size):
+    """Сверяет счётчики таблицы name порциями по первичному ключу.
+
+    Генератор: после каждой порции отдаёт число исправленных строк.
+    """
+    model, counters = RECONCILE[name]
+    real = {
+        f'real_{counter}': _count_subquery(source, field)
+        for counter, (source, field) in counters.items()}
+    last_pk = None
+    while True:
+        rows = model.objects.order_by('pk')
+        if last_pk is not None:
+            rows = rows.filter(pk__gt=last_pk)
+        rows = list(rows.annotate(**real)[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1].pk
+        drifted = []
+        for row in rows:
+            changed = False
+            for counter in counters:
+                value = getattr(row, f'real_{counter}')
+                if getattr(row, counter) != value:
+                    setattr(row, counter, value)
+                    changed = True
+            if changed:
+                drifted.append(row)
+        model.objects.bulk_update(drifted, list(counters))
+        yield len(drifted)
+
+
+def recount(name, pks):
+    """Пересчитывает счётчики таблицы name у строк pks одним UPDATE.
+
+    pks - список ключей или выборка values('...') с ними.
+    """
+    model, counters = RECONCILE[name]
+    return model.objects.filter(pk__in=pks).update(**{
+        counter: _count_subquery(source, field)
+        for counter, (source, field) in counters.items()})
@@ -0,0 +1,147 @@
+"""Потоковая выгрузка постов и комментариев пользователя.
+
+Строки читаются из БД порциями через values_list().iterator() и сразу
+отдаются байтами, поэтому память не зависит от числа постов. Записи
+NDJSON совместимы с командой import_posts. Архив zip пишется в поток
+без перемотки, картинки кладутся в него под своими именами в хранилище.
+"""
+import io
+import json
+import zipfile
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Comment, Post
+from .storage import post_image_storage
+
+FORMATS = ('ndjson', 'zip')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'zip': 'application/zip',
+}
+IMAGE_CHUNK_SIZE = 64 * 1024
+LOCK_KEY = 'posts:export:{}'
+
+
+def _line(record):
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode()
+
+
+def iter_ndjson(user):
+    """Строки NDJSON: сначала посты пользователя, затем его комментарии."""
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    posts = (
+        Post.objects.filter(author=user).order_by('pk')
+        .values_list('pk', 'text', 'group__slug', 'pub_date', 'image')
+        .iterator(chunk_size=chunk_size))
+    for pk, text, group, pub_date, image in posts:
+        yield _line({
+            'kind': 'post', 'id': pk, 'text': text,
+            'author': user.username, 'group': group,
+            'pub_date': pub_date.isoformat(), 'image': image or None})
+    comments = (
+        Comment.objects.filter(author=user).order_by('pk')
+        .values_list('pk', 'post_id', 'text', 'created')
+        .iterator(chunk_size=chunk_size))
+    for pk, post_id, text, created in comments:
+        yield _line({
+            'kind': 'comment', 'id': pk, 'post': post_id, 'text': text,
+            'author': user.username, 'pub_date': created.isoformat()})
+
+
+class _Buffer(io.RawIOBase):
+    """Неперематываемый файл, из которого забирают записанные байты."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip(user):
+    """Архив zip по частям: записи NDJSON и картинки постов."""
+    # zipfile пишет много мелких кусков; пустые отдавать незачем
+    return (chunk for chunk in _iter_zip(user) if chunk)
+
+
+def _iter_zip(user):
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('posts.ndjson', 'w', force_zip64=True) as entry:
+            for line in iter_ndjson(user):
+                entry.write(line)
+                yield buffer.pop()
+        # Одинаковые картинки хранятся одним файлом и попадают в архив
+        # один раз
+        images = (
+            Post.objects.filter(author=user).exclude(image='')
+            .order_by('image').values_list('image', flat=True).distinct()
+            .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+        for name in images:
+            yield from _write_image(archive, buffer, name)
+    yield buffer.pop()
+
+
+def _write_image(archive, buffer, name):
+    try:
+        source = post_image_storage.open(name, 'rb')
+    except FileNotFoundError:
+        return
+    with source:
+        info = zipfile.ZipInfo(name)
+        # Картинки уже сжаты
+        info.compress_type = zipfile.ZIP_STORED
+        with archive.open(info, 'w', force_zip64=True) as entry:
+            for chunk in iter(lambda: source.read(IMAGE_CHUNK_SIZE), b''):
+                entry.write(chunk)
+                yield buffer.pop()
+
+
+def export(user, format):
+    return iter_zip(user) if format == 'zip' else iter_ndjson(user)
+
+
+def start_export(user, format):
+    """Выгрузка для ответа сервера или None, если она уже идёт.
+
+    Одновременно у пользователя идёт не больше одной выгрузки, чтобы
+    он не занял ими все процессы сервера.
+    """
+    key = LOCK_KEY.format(user.pk)
+    if not cache.add(key, True, settings.EXPORT_LOCK_TIMEOUT):
+        return None
+    return _Unlocking(key, export(user, format))
+
+
+class _Unlocking:
+    """Итератор выгрузки, снимающий блокировку при закрытии ответа.
+
+    Генератор с finally не подходит: если клиент отключился до первого
+    куска, close() не выполнит его finally.
+    """
+
+    def __init__(self, key, chunks):
+        self.key = key
+        self.chunks = chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        self.chunks.close()
+        cache.delete(self.key)
+
+
+def filename(user, format):
+    return f'yatube-{user.username}.{format}'
@@ -0,0 +1,130 @@
+"""RSS- и Atom-ленты новых постов группы и автора.
+
+Лента строится из SYNDICATION_ITEMS последних постов одним запросом с
+JOIN. Готовый ответ хранится в кеше страниц и сбрасывается поколением
+group:<id> или author:<id>, которое сдвигают сигналы при новом посте
+и при переименовании группы (её название - категория записей);
+ETag тот же, что у HTML-страницы, поэтому опрос без изменений
+получает 304. Last-Modified - время последнего сдвига этого поколения,
+а не дата новейшего поста: она не меняется при правке и удалении постов
+и переименовании группы.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from .cache import (
+    cache_anonymous_page, cached_lookup, last_modified, tag_page)
+from .models import Group, Post, User
+from .views import group_etag, profile_etag
+
+
+class PostsFeed(Feed):
+    def __call__(self, request, *args, **kwargs):
+        response = super().__call__(request, *args, **kwargs)
+        # Feed ставит Last-Modified по дате новейшего поста; заголовок
+        # по поколению ставит condition()
+        del response['Last-Modified']
+        return response
+
+    def items(self, obj):
+        return self.posts(obj).select_related('author', 'group').order_by(
+            '-pub_date', '-id')[:settings.SYNDICATION_ITEMS]
+
+    def item_title(self, post):
+        return Truncator(post.text).chars(60)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+
+class GroupPostsFeed(PostsFeed):
+    def get_object(self, request, slug):
+        group = get_object_or_404(Group, slug=slug)
+        tag_page(request, f'group:{group.pk}')
+        return group
+
+    def posts(self, group):
+        return Post.objects.filter(group=group)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def description(self, group):
+        return group.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = GroupPostsFeed.description
+
+
+class AuthorPostsFeed(PostsFeed):
+    def get_object(self, request, username):
+        author = get_object_or_404(User, username=username)
+        tag_page(request, f'author:{author.pk}')
+        return author
+
+    def posts(self, author):
+        return Post.objects.filter(author=author)
+
+    def title(self, author):
+        return f'Yatube: посты {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def description(self, author):
+        return f'Новые посты пользователя {author.username}'
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = AuthorPostsFeed.description
+
+
+def group_last_modified(request, slug):
+    group_id = cached_lookup('group', slug, lambda: Group.objects.filter(
+        slug=slug).values_list('pk', flat=True).first())
+    if group_id is not None:
+        return last_modified(f'group:{group_id}')
+
+
+def profile_last_modified(request, username):
+    user_id = cached_lookup('user', username, lambda: User.objects.filter(
+        username=username).values_list('pk', flat=True).first())
+    if user_id is not None:
+        return last_modified(f'author:{user_id}')
+
+
+def feed_view(feed, etag_func, last_modified_func):
+    return condition(
+        etag_func=etag_func, last_modified_func=last_modified_func,
+    )(cache_anonymous_page(feed))
+
+
+group_rss = feed_view(GroupPostsFeed(), group_etag, group_last_modified)
+group_atom = feed_view(
+    GroupPostsAtomFeed(), group_etag, group_last_modified)
+author_rss = feed_view(AuthorPostsFeed(), profile_etag, profile_last_modified)
+author_atom = feed_view(
+    AuthorPostsAtomFeed(), profile_etag, profile_last_modified)
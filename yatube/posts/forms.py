@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from . import uploads
 from .models import Post, Comment
 
 
@@ -12,6 +14,20 @@ class PostForm(forms.ModelForm):
             'group': 'Группа, к которой будет относиться пост',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # При редактировании без новой загрузки здесь сохранённый файл
+        if not isinstance(image, UploadedFile):
+            return image
+        uploads.check_size(image)
+        uploads.check_pixels(*uploads.image_size(image))
+        return uploads.downscale(image)
+
+    def save(self, commit=True):
+        if 'image' in self.changed_data:
+            self.instance.update_image_metadata()
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
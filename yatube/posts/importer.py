@@ -0,0 +1,290 @@
+"""Потоковый импорт постов и комментариев из NDJSON или CSV.
+
+Записи читаются по одной и вставляются bulk_create порциями, каждая в
+своей транзакции, поэтому память не зависит от размера входа. Авторы и
+группы ищутся по username и slug через словари в памяти, которые
+пополняются одним запросом на порцию.
+
+bulk_create не вызывает сигналы: поколения кеша сдвигаются после каждой
+порции, а счётчики, ленты подписок и последовательности id
+пересчитываются один раз в finish(), после чего поколения всех
+затронутых страниц сдвигаются ещё раз.
+"""
+import csv
+import json
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters
+from .cache import bump_generation, post_scopes
+from .models import Comment, Follow, Group, Post, User
+from .storage import post_image_storage
+from .timeline import rebuild_user_timeline
+
+FORMATS = ('ndjson', 'csv')
+
+
+class RecordError(ValueError):
+    pass
+
+
+def iter_records(file, format):
+    """Пары (номер записи, запись) из файла в формате format.
+
+    Записи NDJSON отдаются строками и разбираются в Importer.add().
+    """
+    if format == 'csv':
+        rows = csv.DictReader(file)
+        for number, row in enumerate(rows, 1):
+            yield number, {
+                key: value for key, value in row.items() if value}
+        return
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            yield number, line
+
+
+@contextmanager
+def _explicit_dates():
+    # auto_now_add перезаписал бы даты из файла при bulk_create
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _parse_date(value):
+    if value is None:
+        return timezone.now()
+    try:
+        date = parse_datetime(value)
+    except (TypeError, ValueError):
+        date = None
+    if date is None:
+        raise RecordError(f'неверная дата {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def _parse_id(value, name):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RecordError(f'неверный {name} {value!r}')
+
+
+class Importer:
+    """Накапливает записи и вставляет их порциями по batch_size.
+
+    on_error(номер записи, сообщение) вызывается для пропущенных
+    записей. После последней записи нужно вызвать finish().
+    """
+
+    def __init__(self, batch_size, on_error):
+        self.batch_size = batch_size
+        self.on_error = on_error
+        self.posts = []
+        self.comments = []
+        self.users = {}
+        self.groups = {}
+        # Проверенные картинки только текущей порции
+        self.images = {}
+        self.authors = set()
+        self.touched_groups = set()
+        # Поколения страниц, которые нужно сдвинуть после пересчёта
+        self.scopes = {'posts', 'follows', 'comments'}
+        # Автор и группа постов текущей порции комментариев
+        self.commented = {}
+        # Комментарии с id больше этого вставлены импортом
+        self.comments_after = (
+            Comment.objects.order_by('-pk')
+            .values_list('pk', flat=True).first() or 0)
+        self.imported = {'post': 0, 'comment': 0}
+
+    def add(self, number, record):
+        if isinstance(record, str):
+            try:
+                record = json.loads(record)
+            except ValueError as error:
+                self.on_error(number, f'не JSON: {error}')
+                return
+        if not isinstance(record, dict):
+            self.on_error(number, 'запись должна быть объектом')
+            return
+        kind = record.get('kind', 'post')
+        if kind not in self.imported:
+            self.on_error(number, f'неизвестный вид записи {kind!r}')
+            return
+        if not record.get('text') or not record.get('author'):
+            self.on_error(number, 'нужны поля text и author')
+            return
+        buffer = self.posts if kind == 'post' else self.comments
+        buffer.append((number, record))
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # Комментарии могут ссылаться на посты из текущей порции
+        posts, self.posts = self.posts, []
+        if posts:
+            self._insert(Post, posts, self._post)
+        comments, self.comments = self.comments, []
+        if comments:
+            self._insert(Comment, comments, self._comment)
+
+    def _resolve(self, mapping, model, field, values):
+        missing = {value for value in values if value not in mapping}
+        if missing:
+            found = dict(model.objects.filter(
+                **{f'{field}__in': missing}).values_list(field, 'pk'))
+            for value in missing:
+                mapping[value] = found.get(value)
+
+    def _lookup(self, mapping, value, name):
+        pk = mapping.get(value)
+        if pk is None:
+            raise RecordError(f'{name} {value!r} не найден')
+        return pk
+
+    def _image(self, name):
+        # Файлы не загружаются: принимаются только имена, уже лежащие в
+        # хранилище, например распакованные из архива выгрузки
+        if not name:
+            return ''
+        if name not in self.images:
+            self.images[name] = post_image_storage.exists(name)
+        if not self.images[name]:
+            raise RecordError(f'картинка {name!r} не найдена')
+        return name
+
+    def _post(self, record):
+        group = record.get('group')
+        return Post(
+            id=_parse_id(record.get('id'), 'id'),
+            text=record['text'],
+            author_id=self._lookup(self.users, record['author'], 'автор'),
+            group_id=group and self._lookup(self.groups, group, 'группа')
+            or None,
+            image=self._image(record.get('image')),
+            pub_date=_parse_date(record.get('pub_date')))
+
+    def _comment(self, record):
+        post_id = _parse_id(record.get('post'), 'post')
+        if post_id is None:
+            raise RecordError('нужно поле post')
+        return Comment(
+            id=_parse_id(record.get('id'), 'id'),
+            text=record['text'],
+            post_id=post_id,
+            author_id=self._lookup(self.users, record['author'], 'автор'),
+            created=_parse_date(record.get('pub_date')))
+
+    def _insert(self, model, buffer, build):
+        self.images = {}
+        self._resolve(
+            self.users, User, 'username',
+            [record['author'] for _, record in buffer])
+        self._resolve(self.groups, Group, 'slug', [
+            record['group'] for _, record in buffer if record.get('group')])
+        built = []
+        for number, record in buffer:
+            try:
+                built.append((number, build(record)))
+            except RecordError as error:
+                self.on_error(number, str(error))
+        if model is Comment:
+            built = self._existing_posts(built)
+        objects = [obj for _, obj in built]
+        if not objects:
+            return
+        with transaction.atomic(), _explicit_dates():
+            model.objects.bulk_create(objects)
+        self.imported[model._meta.model_name] += len(objects)
+        self._after_insert(model, objects)
+
+    def _existing_posts(self, built):
+        self.commented = {
+            pk: (author_id, group_id)
+            for pk, author_id, group_id in Post.objects.filter(
+                pk__in={comment.post_id for _, comment in built})
+            .values_list('pk', 'author_id', 'group_id')}
+        kept = []
+        for number, comment in built:
+            if comment.post_id in self.commented:
+                kept.append((number, comment))
+            else:
+                self.on_error(number, f'пост {comment.post_id} не найден')
+        return kept
+
+    def _after_insert(self, model, objects):
+        if model is Post:
+            authors = {post.author_id for post in objects}
+            groups = {post.group_id for post in objects if post.group_id}
+            self.authors |= authors
+            self.touched_groups |= groups
+            scopes = {'posts'}
+            for post in objects:
+                scopes.update(post_scopes(post.author_id, post.group_id))
+            bump_generation(*sorted(scopes))
+            self.scopes |= scopes
+            return
+        explicit = [comment.id for comment in objects if comment.id]
+        if explicit:
+            self.comments_after = min(self.comments_after, min(explicit) - 1)
+        # Те же поколения, что у сигнала invalidate_comment_fragments:
+        # карточки постов в лентах показывают число комментариев
+        scopes = {'comments'}
+        for post_id in {comment.post_id for comment in objects}:
+            author_id, group_id = self.commented[post_id]
+            scopes.update(post_scopes(author_id, group_id, post_id=post_id))
+            # После пересчёта счётчиков в finish() страницу поста
+            # сбрасывает поколение автора
+            self.scopes.update(post_scopes(author_id, group_id))
+        bump_generation(*sorted(scopes))
+
+    def _chunks(self, pks):
+        pks = sorted(pks)
+        for start in range(0, len(pks), self.batch_size):
+            yield pks[start:start + self.batch_size]
+
+    def finish(self):
+        """Вставляет остаток и пересчитывает производные данные."""
+        self.flush()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Post, Comment]):
+                cursor.execute(sql)
+        for pks in self._chunks(self.authors):
+            counters.recount('users', pks)
+        for pks in self._chunks(self.touched_groups):
+            counters.recount('groups', pks)
+        if self.imported['comment']:
+            counters.recount('posts', Comment.objects.filter(
+                pk__gt=self.comments_after).values('post_id'))
+        rebuilt = set()
+        for pks in self._chunks(self.authors):
+            followers = (
+                Follow.objects.filter(author_id__in=pks)
+                .order_by('user_id').values_list('user_id', flat=True)
+                .distinct())
+            for user_id in followers:
+                # Подписчик нескольких авторов встретится в разных порциях
+                if user_id not in rebuilt:
+                    rebuild_user_timeline(user_id)
+                    rebuilt.add(user_id)
+        # Страницы, закешированные во время импорта, видели старые
+        # счётчики и ленты без новых постов
+        bump_generation(*sorted(self.scopes))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+METADATA_FIELDS = ['image_width', 'image_height', 'image_size', 'image_format']
+
+
+class Command(BaseCommand):
+    help = ('Заполняет размеры, объём и формат картинок у постов, '
+            'сохранённых до появления этих полей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Сколько постов обрабатывать за один запрос.')
+
+    def handle(self, *args, chunk_size, **options):
+        pending = Post.objects.exclude(image='').filter(
+            image_width__isnull=True).only('pk', 'image').order_by('pk')
+        filled = failed = 0
+        last_pk = 0
+        while True:
+            posts = list(pending.filter(pk__gt=last_pk)[:chunk_size])
+            if not posts:
+                break
+            last_pk = posts[-1].pk
+            updated = []
+            for post in posts:
+                try:
+                    with post.image.open('rb'):
+                        post.update_image_metadata()
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{post.image.name}: {error}')
+                    continue
+                updated.append(post)
+            Post.objects.bulk_update(updated, METADATA_FIELDS)
+            filled += len(updated)
+        self.stdout.write(self.style.SUCCESS(
+            f'Заполнено постов: {filled}, с ошибками: {failed}'))
@@ -0,0 +1,48 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.media_gc import dispose, find_orphans
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из MEDIA_ROOT картинки постов и миниатюры, на которые '
+            'нет ссылок, или переносит их в карантин.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько имён файлов проверять за один запрос.')
+        parser.add_argument(
+            '--min-age', type=int, default=60 * 60 * 24,
+            help='Не трогать файлы моложе стольких секунд.')
+        parser.add_argument(
+            '--quarantine',
+            help='Каталог вне MEDIA_ROOT, куда переносить файлы вместо '
+                 'удаления.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести найденные файлы.')
+
+    def handle(self, *args, batch_size, min_age, quarantine, dry_run,
+               **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть не меньше 1.')
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        if quarantine:
+            quarantine = os.path.abspath(quarantine)
+            if os.path.commonpath([quarantine, media_root]) == media_root:
+                raise CommandError('Карантин не может лежать в MEDIA_ROOT.')
+        found = 0
+        for directory, names in find_orphans(batch_size, min_age):
+            found += len(names)
+            if dry_run:
+                self.stdout.write('\n'.join(names))
+                continue
+            dispose(directory, names, quarantine)
+            self.stdout.write(f'{directory}: обработано файлов {len(names)}')
+        action = 'найдено' if dry_run else (
+            'перенесено в карантин' if quarantine else 'удалено')
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов без ссылок {action}: {found}'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты и комментарии пользователя в NDJSON или zip '
+            'с картинками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--format', choices=FORMATS, default=FORMATS[0],
+            help='ndjson - только записи, zip - записи и картинки.')
+        parser.add_argument(
+            '--output', metavar='PATH',
+            help='Куда записать выгрузку; без него NDJSON выводится '
+                 'в stdout.')
+
+    def handle(self, *args, username, format, output, **options):
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f'Пользователь {username!r} не найден.')
+        if output is None:
+            if format == 'zip':
+                raise CommandError('Для zip нужен --output.')
+            for line in export(user, format):
+                self.stdout.write(line.decode(), ending='')
+            return
+        written = 0
+        with open(output, 'wb') as file:
+            for chunk in export(user, format):
+                file.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено в {output}: {written} байт'))
@@ -0,0 +1,61 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts.importer import FORMATS, Importer, iter_records
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты и комментарии из NDJSON или CSV потоком, '
+            'вставляя их порциями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с записями; "-" - стандартный ввод.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат входа; по умолчанию - по расширению файла.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько записей вставлять одним запросом в одной '
+                 'транзакции.')
+
+    def handle(self, *args, path, format, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size >= 1.')
+        if format is None:
+            extension = os.path.splitext(path)[1].lstrip('.').lower()
+            format = extension if extension in FORMATS else 'ndjson'
+        skipped = 0
+
+        def on_error(number, message):
+            nonlocal skipped
+            skipped += 1
+            self.stderr.write(f'Запись {number} пропущена: {message}')
+
+        importer = Importer(batch_size, on_error)
+        file = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline=''))
+        try:
+            for number, record in iter_records(file, format):
+                importer.add(number, record)
+                if number % (batch_size * 10) == 0:
+                    self.stdout.write(f'Прочитано записей: {number}')
+            importer.flush()
+        except IntegrityError as error:
+            raise CommandError(
+                f'Порция до записи {number} не вставлена: {error}. '
+                f'Предыдущие порции сохранены.')
+        finally:
+            if file is not sys.stdin:
+                file.close()
+            # Счётчики и ленты пересчитываются и после ошибки - для
+            # порций, которые уже вставлены
+            importer.finish()
+        self.stdout.write(self.style.SUCCESS(
+            'Импортировано постов {post}, комментариев {comment}; '
+            'пропущено записей {skipped}'.format(
+                skipped=skipped, **importer.imported)))
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Group, Post, User
+from posts.regroup import move_posts
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты между группами порциями, одним UPDATE '
+            'на порцию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from-group', metavar='SLUG',
+            help='Переносить посты этой группы.')
+        parser.add_argument(
+            '--author', metavar='USERNAME',
+            help='Переносить посты этого автора.')
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            '--to-group', metavar='SLUG',
+            help='Группа, в которую переносятся посты.')
+        target.add_argument(
+            '--ungroup', action='store_true',
+            help='Убрать посты из групп.')
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.POST_REGROUP_CHUNK_SIZE,
+            help='Сколько постов переносить одним запросом.')
+
+    def handle(self, *args, from_group, author, to_group, ungroup,
+               chunk_size, **options):
+        if not from_group and not author:
+            raise CommandError('Укажите --from-group или --author.')
+        if not to_group and not ungroup:
+            raise CommandError('Укажите --to-group или --ungroup.')
+        if chunk_size < 1:
+            raise CommandError('--chunk-size >= 1.')
+        posts = Post.objects.all()
+        if from_group:
+            posts = posts.filter(group=self.get(Group, slug=from_group))
+        if author:
+            posts = posts.filter(author=self.get(User, username=author))
+        target = None if ungroup else self.get(Group, slug=to_group).pk
+        moved = 0
+        for count in move_posts(posts, target, chunk_size):
+            moved += count
+            self.stdout.write(f'Перенесено постов: {moved}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: перенесено постов {moved}'))
+
+    @staticmethod
+    def get(model, **lookup):
+        try:
+            return model.objects.get(**lookup)
+        except model.DoesNotExist:
+            raise CommandError(f'{model.__name__} не найден: {lookup}')
@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from posts.cache import bump_generation, post_scopes
+from posts.models import Post
+from posts.thumbnails import rebuild_thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Пересоздаёт миниатюры из POST_THUMBNAILS для всех картинок '
+            'постов в пуле процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Сколько процессов создают миниатюры; 0 - в текущем.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Сколько постов читать из БД и отдавать пулу за раз.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Удалить готовые миниатюры и создать их заново.')
+        parser.add_argument(
+            '--state-file',
+            help='Файл, куда после каждой порции записывается id '
+                 'последнего обработанного поста.')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с id, сохранённого в --state-file.')
+
+    def handle(self, *args, workers, chunk_size, force, state_file, resume,
+               **options):
+        if workers < 0 or chunk_size < 1:
+            raise CommandError('--workers >= 0, --chunk-size >= 1.')
+        if resume and not state_file:
+            raise CommandError('--resume требует --state-file.')
+        last_pk = self.read_state(state_file) if resume else 0
+        posts = Post.objects.exclude(image='').order_by('pk')
+        total = posts.filter(pk__gt=last_pk).count()
+        rebuild = partial(rebuild_thumbnails, force=force)
+        pool = None
+        if workers:
+            # Дочерние процессы не должны делить соединения родителя
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers)
+        done = failed = 0
+        try:
+            while True:
+                chunk = list(posts.filter(pk__gt=last_pk).values_list(
+                    'pk', 'image')[:chunk_size])
+                if not chunk:
+                    break
+                # Одинаковые картинки хранятся одним файлом
+                names = list(dict.fromkeys(name for _, name in chunk))
+                results = (
+                    pool.map(rebuild, names) if pool
+                    else map(rebuild, names))
+                rebuilt = []
+                for name, ok in results:
+                    if ok:
+                        rebuilt.append(name)
+                    else:
+                        failed += 1
+                        self.stderr.write(f'Ошибка: {name}')
+                self.invalidate_pages(rebuilt)
+                done += len(chunk)
+                last_pk = chunk[-1][0]
+                self.write_state(state_file, last_pk)
+                self.stdout.write(
+                    f'Обработано постов {done} из {total}, id {last_pk}')
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: постов {done}, картинок с ошибками {failed}'))
+
+    @staticmethod
+    def invalidate_pages(names):
+        # Страницы могли закешировать удалённые миниатюры или исходные
+        # картинки. Поколения сдвигаются здесь, а не в процессах пула:
+        # у тех может быть свой локальный кеш
+        scopes = set()
+        posts = Post.objects.filter(image__in=names).values_list(
+            'pk', 'author_id', 'group_id')
+        for pk, author_id, group_id in posts:
+            scopes.update(post_scopes(author_id, group_id, post_id=pk))
+        if scopes:
+            bump_generation(*sorted(scopes))
+
+    @staticmethod
+    def read_state(state_file):
+        try:
+            with open(state_file) as file:
+                return int(file.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def write_state(state_file, last_pk):
+        if not state_file:
+            return
+        temporary = f'{state_file}.tmp'
+        with open(temporary, 'w') as file:
+            file.write(str(last_pk))
+        os.replace(temporary, state_file)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow, Timeline
+from posts.timeline import demote_heavy_authors, rebuild_user_timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок порциями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', dest='users', type=int,
+            help='id пользователя; можно указать несколько раз.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.TIMELINE_CHUNK_SIZE,
+            help='Сколько подписчиков обрабатывать за один проход.')
+
+    def handle(self, *args, users=None, chunk_size, **options):
+        if users is None:
+            demoted = demote_heavy_authors()
+            self.stdout.write(f'Снято отметок HeavyAuthor: {demoted}')
+            # Ленты тех, у кого не осталось подписок, просто очищаются
+            Timeline.objects.exclude(
+                user_id__in=Follow.objects.values('user_id')).delete()
+            users = (
+                Follow.objects.order_by('user_id')
+                .values_list('user_id', flat=True)
+                .distinct()
+                .iterator(chunk_size=chunk_size))
+        rebuilt = 0
+        for user_id in users:
+            rebuild_user_timeline(user_id, chunk_size)
+            rebuilt += 1
+            if rebuilt % chunk_size == 0:
+                self.stdout.write(f'Пересобрано лент: {rebuilt}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, пересобрано лент: {rebuilt}'))
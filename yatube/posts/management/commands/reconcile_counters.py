@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.counters import RECONCILE, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с данными порциями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables', nargs='*',
+            help='Какие счётчики сверять: {}; по умолчанию все.'.format(
+                ', '.join(sorted(RECONCILE))))
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько строк сверять за один запрос.')
+
+    def handle(self, *args, tables, chunk_size, **options):
+        unknown = set(tables) - set(RECONCILE)
+        if unknown:
+            raise CommandError(
+                'Неизвестные счётчики: {}'.format(', '.join(sorted(unknown))))
+        for name in tables or sorted(RECONCILE):
+            fixed = checked = 0
+            for drifted in reconcile(name, chunk_size):
+                fixed += drifted
+                checked += 1
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: порций {checked}, исправлено строк {fixed}'))
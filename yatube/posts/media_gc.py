@@ -0,0 +1,104 @@
+"""Поиск и удаление файлов в MEDIA_ROOT, на которые нет ссылок.
+
+Каталоги обходятся os.scandir потоком, имена проверяются по БД
+порциями, поэтому память не зависит от числа файлов. Картинки постов
+сверяются с Post.image, миниатюры - с key-value хранилищем
+sorl-thumbnail.
+"""
+import os
+import shutil
+import time
+
+from django.conf import settings
+from sorl.thumbnail import default, delete
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from .models import Post
+from .storage import post_image_storage
+
+
+def iter_files(directory, older_than):
+    """Относительные к MEDIA_ROOT имена файлов в directory и глубже.
+
+    Пропускаются файлы, изменённые позже older_than: их ещё может
+    сохранять незавершённый запрос.
+    """
+    stack = [os.path.join(settings.MEDIA_ROOT, directory)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif (entry.is_file(follow_symlinks=False)
+                        and entry.stat().st_mtime < older_than):
+                    yield os.path.relpath(
+                        entry.path, settings.MEDIA_ROOT).replace(os.sep, '/')
+
+
+def _batches(names, size):
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def orphaned_images(names):
+    referenced = set(Post.objects.filter(
+        image__in=names).values_list('image', flat=True))
+    return [name for name in names if name not in referenced]
+
+
+def orphaned_thumbnails(names):
+    keys = {
+        name: add_prefix(ImageFile(name, default.storage).key)
+        for name in names}
+    referenced = set(KVStore.objects.filter(
+        key__in=keys.values()).values_list('key', flat=True))
+    return [name for name, key in keys.items() if key not in referenced]
+
+
+IMAGES_DIRECTORY = Post._meta.get_field('image').upload_to.strip('/')
+SWEEPS = (
+    # Сначала картинки: удаление картинки убирает и её миниатюры
+    (IMAGES_DIRECTORY, orphaned_images),
+    (thumbnail_settings.THUMBNAIL_PREFIX.strip('/'), orphaned_thumbnails),
+)
+
+
+def find_orphans(batch_size, min_age):
+    """Генератор порций (каталог, имена файлов без ссылок)."""
+    older_than = time.time() - min_age
+    for directory, check in SWEEPS:
+        for batch in _batches(iter_files(directory, older_than), batch_size):
+            orphans = check(batch)
+            if orphans:
+                yield directory, orphans
+
+
+def dispose(directory, names, quarantine=None):
+    """Удаляет файлы names или переносит их в каталог quarantine."""
+    for name in names:
+        if directory == IMAGES_DIRECTORY:
+            # Ссылки sorl на миниатюры картинки и сами миниатюры
+            delete(ImageFile(name, post_image_storage), delete_file=False)
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        if quarantine:
+            target = os.path.join(quarantine, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(path, target)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_timelines(apps, schema_editor):
+    # Одним INSERT ... SELECT: иначе ленты подписок существующих
+    # пользователей остались бы пустыми до rebuild_timelines
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    Timeline = apps.get_model('posts', 'Timeline')
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        'INSERT INTO {timeline} (user_id, post_id, pub_date) '
+        'SELECT DISTINCT f.user_id, p.id, p.pub_date '
+        'FROM {follow} f INNER JOIN {post} p ON p.author_id = f.author_id'
+        .format(
+            timeline=quote(Timeline._meta.db_table),
+            follow=quote(Follow._meta.db_table),
+            post=quote(Post._meta.db_table)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0009_auto_20211001_1517'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-pub_date', '-post'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timeline',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_pub_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timeline',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_post'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
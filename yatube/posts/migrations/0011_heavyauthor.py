@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeavyAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='heavy', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
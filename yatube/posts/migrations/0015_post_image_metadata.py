@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_format',
+            field=models.CharField(blank=True, editable=False, max_length=10, verbose_name='Формат картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер картинки, байт'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+# Полнотекстовые индексы FTS5 с внешним содержимым: тексты хранятся
+# только в posts_post и posts_comment, а триггеры поддерживают индексы
+# при любых изменениях, включая bulk_create и update(). Индексируется
+# текст с заменой ё на е: remove_diacritics действует только на латиницу
+TABLES = (
+    ('posts_post', 'posts_post_fts'),
+    ('posts_comment', 'posts_comment_fts'),
+)
+
+FOLD = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+CREATE = (
+    """
+    CREATE VIRTUAL TABLE {fts} USING fts5(
+        text, content='{table}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {fts}(rowid, text) VALUES (new.id, {new});
+    END
+    """,
+    """
+    CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {fts}({fts}, rowid, text)
+        VALUES ('delete', old.id, {old});
+    END
+    """,
+    """
+    CREATE TRIGGER {fts}_update AFTER UPDATE OF text ON {table} BEGIN
+        INSERT INTO {fts}({fts}, rowid, text)
+        VALUES ('delete', old.id, {old});
+        INSERT INTO {fts}(rowid, text) VALUES (new.id, {new});
+    END
+    """,
+    "INSERT INTO {fts}(rowid, text) SELECT id, {text} FROM {table}",
+)
+
+DROP = (
+    'DROP TRIGGER IF EXISTS {fts}_insert',
+    'DROP TRIGGER IF EXISTS {fts}_delete',
+    'DROP TRIGGER IF EXISTS {fts}_update',
+    'DROP TABLE IF EXISTS {fts}',
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for table, fts in TABLES:
+            for statement in statements:
+                schema_editor.execute(statement.format(
+                    table=table, fts=fts, new=FOLD.format('new.text'),
+                    old=FOLD.format('old.text'), text=FOLD.format('text')))
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_image_metadata'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE), run(DROP)),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 
-from django.db import models
+from django.db import models, transaction
+
+from . import uploads
+from .storage import post_image_storage
 
 User = get_user_model()
 
@@ -9,6 +12,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -35,14 +39,57 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False)
+    image_size = models.PositiveIntegerField(
+        'Размер картинки, байт', null=True, blank=True, editable=False)
+    image_format = models.CharField(
+        'Формат картинки', max_length=10, blank=True, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Счётчики обновляются в post_save и должны попасть в ту же
+        # транзакцию, что и сама запись
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def update_image_metadata(self):
+        """Заполняет размеры, объём и формат картинки по её заголовку.
+
+        Файл картинки должен быть открыт.
+        """
+        if self.image:
+            (self.image_width, self.image_height,
+             self.image_size, self.image_format) = (
+                uploads.read_image_metadata(self.image))
+        else:
+            self.image_width = self.image_height = self.image_size = None
+            self.image_format = ''
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -65,8 +112,22 @@ class Comment(models.Model):
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+            models.Index(
+                fields=['-created', '-id'],
+                name='comment_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -81,6 +142,10 @@ class Follow(models.Model):
         related_name='following',
     )
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -88,3 +153,67 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
+
+
+class Timeline(models.Model):
+    """Материализованная лента подписок: строка на пост для подписчика."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date', '-post']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_post'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            )
+        ]
+
+
+class HeavyAuthor(models.Model):
+    """Автор, чьи посты не раскладываются по лентам подписчиков.
+
+    Отметка ставится, когда число подписчиков достигает порога
+    TIMELINE_FANOUT_MAX_FOLLOWERS, и снимается только при пересборке
+    лент, поэтому посты, опубликованные без раскладки, не теряются.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='heavy',
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
@@ -0,0 +1,251 @@
+import base64
+import binascii
+import collections.abc
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .cache import cached_count
+
+ELLIPSIS = '…'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(pub_date, pk):
+    """Упаковывает ключ (pub_date, id) в непрозрачный токен для URL."""
+    raw = f'{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен обратно в ключ (pub_date, id)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_part, pk_part = raw.split('|')
+        pub_date = parse_datetime(date_part)
+        pk = int(pk_part)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(token)
+    if not isinstance(pub_date, datetime):
+        raise InvalidCursor(token)
+    return pub_date, pk
+
+
+def keyset(queryset, key, backwards=False, date_field='pub_date',
+           id_field='id'):
+    """Упорядоченная выборка строк строго после ключа (pub_date, id).
+
+    Вперёд - по убыванию ключа, назад (backwards) - по возрастанию.
+    """
+    if backwards:
+        lookup, ordering = 'gt', (date_field, id_field)
+    else:
+        lookup, ordering = 'lt', (f'-{date_field}', f'-{id_field}')
+    if key is not None:
+        pub_date, pk = key
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{date_field: pub_date, f'{id_field}__{lookup}': pk})
+        )
+    return queryset.order_by(*ordering)
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница ленты, адресуемая курсорами вместо номера."""
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id).
+
+    Страница выбирается условием по ключу последней (или первой) записи
+    предыдущей страницы, поэтому запрос не использует OFFSET и COUNT и
+    стоит одинаково на любой глубине ленты. Вместо queryset можно
+    передать объект с методом seek(key, backwards, limit).
+    """
+    cursor_mode = True
+    date_field = 'pub_date'
+    id_field = 'id'
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def _key(self, obj):
+        return getattr(obj, self.date_field), getattr(obj, self.id_field)
+
+    def _seek(self, key, backwards, limit):
+        seek = getattr(self.object_list, 'seek', None)
+        if seek is not None:
+            return seek(key, backwards, limit)
+        return list(keyset(
+            self.object_list, key, backwards,
+            self.date_field, self.id_field)[:limit])
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before.
+
+        Некорректный токен вызывает InvalidCursor.
+        """
+        backwards = before is not None and after is None
+        token = before if backwards else after
+        key = decode_cursor(token) if token else None
+        rows = self._seek(key, backwards, self.per_page + 1)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, key is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(*self._key(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor(*self._key(rows[0]))
+        return self._get_page(rows, self, next_cursor, previous_cursor)
+
+    def _get_page(self, *args, **kwargs):
+        return CursorPage(*args, **kwargs)
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но при некорректном курсоре отдаёт первую страницу."""
+        try:
+            page = self.page(after, before)
+        except InvalidCursor:
+            return self.page()
+        if not page and (after or before):
+            return self.page()
+        return page
+
+
+def elided_page_range(page, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей с многоточиями на месте пропусков.
+
+    Длина результата ограничена 2 * (on_each_side + on_ends) + 3
+    элементами независимо от числа страниц.
+    """
+    number, num_pages = page.number, page.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        yield from range(1, num_pages + 1)
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
+
+
+def estimate_count(queryset):
+    """Оценка числа строк таблицы по статистике СУБД без COUNT(*).
+
+    Работает только для нефильтрованных выборок; если статистики нет,
+    возвращает None.
+    """
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    try:
+        return int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, берущий число записей из кеша счётчиков.
+
+    generations - имена поколений, при сдвиге которых кеш сбрасывается.
+    С approximate=True для больших нефильтрованных таблиц используется
+    оценка по статистике СУБД, а count_is_approximate становится True;
+    если запрошенная страница лежит за пределами оценки, число записей
+    считается точно.
+    """
+    count_is_approximate = False
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, generations=('posts',),
+                 approximate=False):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.generations = generations
+        self.approximate = approximate
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return self.object_list.count()
+        if self.approximate:
+            estimate = estimate_count(self.object_list)
+            threshold = settings.FEED_COUNT_APPROXIMATE_ABOVE
+            if estimate is not None and estimate >= threshold:
+                self.count_is_approximate = True
+                return estimate
+        return cached_count(self.object_list, self.generations)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.count_is_approximate:
+                raise
+        # Статистика могла устареть и занизить число записей: для
+        # страницы за пределами оценки берётся точное число
+        self.count_is_approximate = False
+        self.count = cached_count(self.object_list, self.generations)
+        self.__dict__.pop('num_pages', None)
+        return super().validate_number(number)
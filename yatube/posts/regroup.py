@@ -0,0 +1,55 @@
+"""Массовый перенос постов между группами.
+
+Посты переносятся порциями по первичному ключу одним UPDATE на порцию,
+без сохранения каждого поста, поэтому сигналы не срабатывают: счётчики
+групп и поколения кеша сдвигаются здесь же, один раз на порцию.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from . import counters
+from .cache import bump_generation
+from .models import Group, Post
+
+
+def move_posts(posts, group_id, chunk_size):
+    """Переносит посты выборки posts в группу group_id (None - из групп).
+
+    Генератор: после каждой порции отдаёт число перенесённых постов.
+    """
+    if group_id is None:
+        posts = posts.filter(group__isnull=False)
+    else:
+        posts = posts.exclude(group_id=group_id)
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                posts.filter(pk__gt=last_pk).order_by('pk')
+                .select_for_update()
+                .values_list('pk', 'author_id', 'group_id')[:chunk_size])
+            if not rows:
+                return
+            last_pk = rows[-1][0]
+            Post.objects.filter(
+                pk__in=[pk for pk, _, _ in rows]).update(group_id=group_id)
+            moved = Counter(previous for _, _, previous in rows)
+            for previous, count in moved.items():
+                counters.change(Group, previous, 'posts_count', -count)
+            counters.change(Group, group_id, 'posts_count', len(rows))
+        bump_generation('posts', 'feed', *_scopes(rows, group_id))
+        yield len(rows)
+
+
+def _scopes(rows, group_id):
+    # Страницу поста сбрасывает поколение автора (см. post_etag), поэтому
+    # поколения post:<id> по одному на строку не нужны
+    scopes = set()
+    for _, author_id, previous in rows:
+        scopes.add(f'author:{author_id}')
+        if previous:
+            scopes.add(f'group:{previous}')
+    if group_id:
+        scopes.add(f'group:{group_id}')
+    return sorted(scopes)
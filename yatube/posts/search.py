@@ -0,0 +1,122 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+На SQLite используются индексы FTS5 posts_post_fts и posts_comment_fts
+(миграция 0016_search), которые поддерживаются триггерами; ё в них
+заменена на е. Если Django пересоздаёт таблицу posts_post или
+posts_comment в будущей миграции, триггеры нужно создать заново. На
+других СУБД поиск сводится к icontains по тексту поста.
+
+Результаты ранжируются по bm25: совпадение в комментарии весит меньше,
+чем в самом посте. Страницы листаются курсором по ключу (ранг, id).
+"""
+import base64
+import binascii
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Post
+from .paginators import InvalidCursor
+
+SEARCH_SQL = """
+SELECT post_id, MIN(score) AS best FROM (
+    SELECT rowid AS post_id, bm25(posts_post_fts) AS score
+    FROM posts_post_fts WHERE posts_post_fts MATCH %s
+    UNION ALL
+    SELECT comment.post_id, bm25(posts_comment_fts) * %s AS score
+    FROM posts_comment_fts
+    JOIN posts_comment AS comment ON comment.id = posts_comment_fts.rowid
+    WHERE posts_comment_fts MATCH %s
+)
+GROUP BY post_id
+{having}
+ORDER BY best, post_id
+LIMIT %s
+"""
+
+
+def encode_search_cursor(score, pk):
+    raw = f'{score!r}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_search_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        score, pk = base64.urlsafe_b64decode(
+            padded.encode()).decode().split('|')
+        return float(score), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(token)
+
+
+def match_expression(query):
+    """Запрос пользователя в синтаксисе FTS5: все слова как фразы.
+
+    Кавычки экранируются, поэтому операторы FTS5 из запроса не работают
+    и не ломают его. Ё заменяется на е, как и в индексе.
+    """
+    words = query.replace('ё', 'е').replace('Ё', 'Е').split()
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def _ranked_ids(query, after, limit):
+    having, params = '', []
+    if after is not None:
+        having = 'HAVING best > %s OR (best = %s AND post_id > %s)'
+        params = [after[0], after[0], after[1]]
+    match = match_expression(query)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SEARCH_SQL.format(having=having),
+            [match, settings.SEARCH_COMMENT_WEIGHT, match, *params, limit])
+        return cursor.fetchall()
+
+
+def _fallback_ids(query, after, limit):
+    posts = Post.objects.filter(text__icontains=query).order_by('pk')
+    if after is not None:
+        posts = posts.filter(pk__gt=after[1])
+    return [(pk, 0.0) for pk in posts.values_list('pk', flat=True)[:limit]]
+
+
+def search_posts(query, after=None, limit=None):
+    """Посты, подходящие под query, и курсор следующей страницы.
+
+    after - ключ (ранг, id) последнего поста предыдущей страницы.
+    """
+    limit = limit or settings.MAX_RECORDS_PER_PAGE
+    if not match_expression(query):
+        return [], None
+    find = _ranked_ids if fts_available() else _fallback_ids
+    rows = find(query, after, limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1][1], rows[-1][0])
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [pk for pk, _ in rows])
+    return [posts[pk] for pk, _ in rows if pk in posts], next_cursor
+
+
+def _ids_matching(fts, query):
+    return (
+        f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s',
+        [match_expression(query)])
+
+
+def post_ids_matching(query):
+    """SQL и параметры подзапроса id постов, чей текст подходит под query.
+
+    Для поиска в админке: фильтр pk__in по индексу вместо LIKE.
+    """
+    return _ids_matching('posts_post_fts', query)
+
+
+def comment_ids_matching(query):
+    """То же, что post_ids_matching, для комментариев."""
+    return _ids_matching('posts_comment_fts', query)
@@ -0,0 +1,209 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+
+from . import counters, timeline
+from .cache import bump_generation, forget_lookup, post_scopes
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Group)
+def invalidate_post_counts(sender, **kwargs):
+    bump_generation('posts')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_counts(sender, **kwargs):
+    bump_generation('follows')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_counts(sender, **kwargs):
+    bump_generation('comments')
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill_follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_unfollow(sender, instance, **kwargs):
+    timeline.prune_follow(instance.user_id, instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, raw=False, **kwargs):
+    instance._previous_group_id = None
+    if instance.pk and not raw:
+        instance._previous_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True).first())
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_user(instance.author_id, 'posts_count', 1)
+        counters.change(Group, instance.group_id, 'posts_count', 1)
+    elif instance._previous_group_id != instance.group_id:
+        counters.change(
+            Group, instance._previous_group_id, 'posts_count', -1)
+        counters.change(Group, instance.group_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'posts_count', -1)
+    counters.change(Group, instance.group_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change(Post, instance.post_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change(Post, instance.post_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user(instance.author_id, 'followers_count', 1)
+        counters.change_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_user(instance.author_id, 'followers_count', -1)
+    counters.change_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_generation(*post_scopes(
+        instance.author_id,
+        instance.group_id,
+        getattr(instance, '_previous_group_id', None),
+        post_id=instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance, **kwargs):
+    forget_lookup('post', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_fragments(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Карточки постов в лентах показывают число комментариев
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'author_id', 'group_id').first()
+    if post is not None:
+        bump_generation(*post_scopes(
+            post['author_id'], post['group_id'], post_id=instance.post_id))
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_names(sender, instance, raw=False, **kwargs):
+    instance._previous_names = None
+    if instance.pk and not raw:
+        instance._previous_names = (
+            Group.objects.filter(pk=instance.pk)
+            .values_list('slug', 'title').first())
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    # После удаления у постов группы уже group_id = NULL
+    instance._author_ids = list(
+        Post.objects.filter(group=instance).order_by()
+        .values_list('author_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_generation(f'group:{instance.pk}')
+        previous = getattr(instance, '_previous_names', None)
+        forget_lookup('group', instance.slug, previous and previous[0])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_author_pages(sender, instance, raw=False, **kwargs):
+    # Ленты, профили и RSS авторов показывают slug и название группы
+    if raw:
+        return
+    author_ids = getattr(instance, '_author_ids', None)
+    if author_ids is None:
+        previous = getattr(instance, '_previous_names', None)
+        if previous is None or previous == (instance.slug, instance.title):
+            return
+        author_ids = (
+            Post.objects.filter(group=instance).order_by()
+            .values_list('author_id', flat=True).distinct())
+    bump_generation(
+        'feed', *(f'author:{author_id}' for author_id in author_ids))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_profile_pages(sender, instance, raw=False, **kwargs):
+    # На странице профиля видно число подписчиков и подписок
+    if not raw:
+        bump_generation(
+            f'author:{instance.author_id}', f'author:{instance.user_id}')
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, update_fields=None,
+                      **kwargs):
+    instance._previous_username = None
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._previous_username = (
+        User.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True).first())
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_pages(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    # Вход пользователя сохраняет только last_login - страницы не меняются
+    if raw or update_fields == frozenset(['last_login']):
+        return
+    bump_generation('feed', f'author:{instance.pk}')
+    forget_lookup(
+        'user', instance.username,
+        getattr(instance, '_previous_username', None))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_pages(sender, instance, **kwargs):
+    bump_generation('feed', f'author:{instance.pk}')
+    forget_lookup('user', instance.username)
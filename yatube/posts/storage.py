@@ -0,0 +1,43 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище, называющее файлы по SHA-256 содержимого.
+
+    Одинаковые загрузки сохраняются один раз, а имя файла никогда не
+    указывает на другое содержимое, поэтому URL можно кешировать навсегда.
+    Файл кладётся в <каталог upload_to>/<2 знака хеша>/<хеш><расширение>.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # Свежая дата изменения защищает файл от сборщика мусора
+            # с --min-age, пока ссылающийся на него пост не сохранён
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    @staticmethod
+    def content_name(name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            os.path.dirname(name), digest[:2], digest + extension)
+
+
+post_image_storage = ContentAddressedStorage()
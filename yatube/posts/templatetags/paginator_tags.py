@@ -0,0 +1,15 @@
+from django import template
+from django.conf import settings
+
+from ..paginators import elided_page_range
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj):
+    """Окно номеров страниц для шаблона пагинатора."""
+    return list(elided_page_range(
+        page_obj,
+        on_each_side=settings.PAGINATOR_ON_EACH_SIDE,
+        on_ends=settings.PAGINATOR_ON_ENDS))
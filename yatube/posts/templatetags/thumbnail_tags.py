@@ -0,0 +1,72 @@
+from django import template
+from django.conf import settings
+from PIL import Image
+
+from ..thumbnails import (
+    enqueue_thumbnails, lookup_thumbnail, picture_aliases, prefetch_thumbnails)
+
+register = template.Library()
+
+
+def _ready_thumbnails(image, aliases):
+    prefetched = getattr(image.instance, 'prefetched_thumbnails', {})
+    return {
+        alias: prefetched[alias] if alias in prefetched
+        else lookup_thumbnail(image, alias)
+        for alias in aliases}
+
+
+@register.simple_tag
+def post_picture(image, alias='card'):
+    """Источники <picture> для изображения поста.
+
+    src - миниатюра alias, sources - готовые варианты из
+    POST_THUMBNAIL_SRCSET, сгруппированные по формату. Пока миниатюры
+    нет, src указывает на исходное изображение, а её создание ставится
+    в очередь: страница не ждёт Pillow. После ошибки повторная попытка
+    не раньше, чем через THUMBNAIL_RETRY_DELAY. Размеры берутся из хранилища
+    миниатюр и полей поста, файл картинки не открывается.
+    """
+    if not image:
+        return None
+    post = image.instance
+    thumbnails = _ready_thumbnails(image, picture_aliases(alias))
+    if None in thumbnails.values():
+        enqueue_thumbnails(image)
+    fallback = thumbnails.pop(alias)
+    if fallback is None:
+        return {
+            'src': image.url,
+            'width': post.image_width,
+            'height': post.image_height,
+            'sources': [],
+        }
+    srcsets = {}
+    for name, thumbnail in thumbnails.items():
+        # Варианты шире оригинала - лишь растянутая копия
+        if thumbnail is None or (
+                post.image_width and thumbnail.width > post.image_width):
+            continue
+        image_format = settings.POST_THUMBNAILS[name][1].get('format', 'JPEG')
+        srcsets.setdefault(Image.MIME[image_format], []).append(
+            f'{thumbnail.url} {thumbnail.width}w')
+    return {
+        'src': fallback.url,
+        'width': fallback.width,
+        'height': fallback.height,
+        'sizes': settings.POST_THUMBNAIL_SIZES,
+        'sources': [
+            {'type': mime, 'srcset': ', '.join(srcset)}
+            for mime, srcset in srcsets.items()],
+    }
+
+
+@register.simple_tag
+def prefetch_page_thumbnails(page_obj, alias='card'):
+    """Одним чтением находит миниатюры всех постов страницы.
+
+    Вызывается внутри {% cache %}, чтобы не выполнять запрос страницы,
+    когда фрагмент берётся из кеша.
+    """
+    prefetch_thumbnails(page_obj, alias)
+    return ''
@@ -0,0 +1,93 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..paginators import CachedCountPaginator
+
+
+class AdminChangeListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.group = Group.objects.create(title='Группа', slug='group')
+
+    def add_rows(self, count):
+        start = User.objects.count()
+        for number in range(start, start + count):
+            author = User.objects.create(username=f'author{number}')
+            post = Post.objects.create(
+                text=f'Пост {number}', author=author, group=self.group)
+            Comment.objects.create(
+                post=post, author=author, text=f'Комментарий {number}')
+            Follow.objects.create(user=self.admin, author=author)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for model in (Post, Comment, Follow):
+            with self.subTest(model=model.__name__):
+                url = reverse(
+                    f'admin:posts_{model._meta.model_name}_changelist')
+                self.add_rows(2)
+                few = self.count_queries(url)
+                self.add_rows(5)
+                self.assertEqual(self.count_queries(url), few)
+
+    def test_changelist_uses_cached_count(self):
+        self.add_rows(1)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        changelist = response.context['cl']
+        self.assertIsInstance(changelist.paginator, CachedCountPaginator)
+        self.assertIsNone(changelist.full_result_count)
+        self.assertEqual(changelist.result_count, 1)
+
+    def test_change_forms_do_not_list_all_rows(self):
+        self.add_rows(3)
+        post = Post.objects.first()
+        comment = Comment.objects.first()
+        pages = (
+            reverse('admin:posts_post_change', args=[post.pk]),
+            reverse('admin:posts_comment_change', args=[comment.pk]),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertNotContains(response, 'author1</option>')
+                self.assertNotContains(response, 'Пост 1</option>')
+
+    def test_comment_search_uses_index(self):
+        self.add_rows(2)
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'комментарий 1'})
+        changelist = response.context['cl']
+        self.assertEqual(
+            [comment.text for comment in changelist.result_list],
+            ['Комментарий 1'])
+        self.assertIn('posts_comment_fts', str(changelist.queryset.query))
+
+    def test_move_to_group_action(self):
+        self.add_rows(3)
+        target = Group.objects.create(title='Другая', slug='other')
+        posts = list(Post.objects.order_by('pk')[:2])
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'), {
+                'action': 'move_to_group',
+                'group': target.pk,
+                '_selected_action': [post.pk for post in posts],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            set(target.posts.values_list('pk', flat=True)),
+            {post.pk for post in posts})
+        target.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual((target.posts_count, self.group.posts_count), (2, 1))
@@ -0,0 +1,120 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, HeavyAuthor, Post, User
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='HasNoName')
+        self.heavy = User.objects.create(username='Heavy')
+        self.reader = User.objects.create(username='Reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=self.author, group=self.group)
+            for number in range(3)]
+        HeavyAuthor.objects.create(author=self.heavy)
+        self.heavy_post = Post.objects.create(
+            text='Тяжёлый', author=self.heavy)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.heavy)
+        for number in range(3):
+            Comment.objects.create(
+                post=self.posts[0], author=self.reader,
+                text=f'Комментарий {number}')
+
+    def get(self, name, params=None, **kwargs):
+        response = self.client.get(reverse(name, kwargs=kwargs), params)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, json.loads(response.content)
+
+    def walk(self, name, params, **kwargs):
+        texts, after = [], None
+        while True:
+            page_params = dict(params, **({'after': after} if after else {}))
+            _, data = self.get(name, page_params, **kwargs)
+            texts += [item['text'] for item in data['results']]
+            after = data['next']
+            if after is None:
+                return texts
+
+    def test_feeds_with_cursor(self):
+        newest_first = [post.text for post in reversed(self.posts)]
+        self.assertEqual(
+            self.walk('posts:api_index', {'limit': 2}),
+            ['Тяжёлый'] + newest_first)
+        self.assertEqual(
+            self.walk('posts:api_group_list', {'limit': 2}, slug='group'),
+            newest_first)
+        self.assertEqual(
+            self.walk(
+                'posts:api_profile', {'limit': 1}, username='HasNoName'),
+            newest_first)
+        self.client.force_login(self.reader)
+        self.assertEqual(
+            self.walk('posts:api_follow_index', {'limit': 2}),
+            ['Тяжёлый'] + newest_first)
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as context:
+            _, data = self.get('posts:api_index', {'fields': 'id,text'})
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        self.assertNotIn('JOIN', context.captured_queries[-1]['sql'])
+        _, data = self.get('posts:api_index', {'fields': 'author,group'})
+        self.assertEqual(
+            data['results'][1], {'author': 'HasNoName', 'group': 'group'})
+
+    def test_post_detail(self):
+        _, data = self.get(
+            'posts:api_post_detail', {'limit': 2},
+            post_id=self.posts[0].pk)
+        self.assertEqual(data['post']['text'], 'Пост 0')
+        self.assertEqual(data['post']['comments_count'], 3)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['Комментарий 2', 'Комментарий 1'])
+        self.assertIsNotNone(data['next'])
+
+    def test_errors(self):
+        cases = (
+            ('posts:api_group_list', {}, {'slug': 'missing'}, 404),
+            ('posts:api_post_detail', {}, {'post_id': 999}, 404),
+            ('posts:api_index', {'fields': 'password'}, {}, 400),
+            ('posts:api_index', {'after': '!!'}, {}, 400),
+            ('posts:api_index', {'limit': 'many'}, {}, 400),
+            ('posts:api_follow_index', {}, {}, 401),
+        )
+        for name, params, kwargs, status in cases:
+            with self.subTest(name=name, params=params):
+                response, data = self.get(name, params, **kwargs)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', data)
+
+    def test_conditional_get(self):
+        url = reverse('posts:api_index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_renamed_lookups_are_forgotten(self):
+        self.get('posts:api_group_list', slug='group')
+        self.get('posts:api_profile', username='HasNoName')
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.author.username = 'Renamed'
+        self.author.save()
+        Group.objects.create(title='Новая', slug='group')
+        User.objects.create(username='HasNoName')
+        _, data = self.get('posts:api_group_list', slug='group')
+        self.assertEqual(data['results'], [])
+        _, data = self.get('posts:api_profile', username='HasNoName')
+        self.assertEqual(data['results'], [])
+        _, data = self.get('posts:api_group_list', slug='renamed')
+        self.assertEqual(len(data['results']), 3)
@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+POST_TEXT = 'Тестовый текст'
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        self.author = User.objects.create(username='Author')
+        self.group = Group.objects.create(
+            title='TestGroup',
+            slug='test-group',
+            description='test-description')
+        self.post = Post.objects.create(
+            text=POST_TEXT,
+            author=self.author,
+            group=self.group)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}),
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}),
+        }
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return etag, client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_returns_not_modified(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                _, response = self.revalidate(self.client, url)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.content, b'')
+
+    def test_not_modified_skips_post_queries(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_post_change_changes_etag(self):
+        etags = {
+            name: self.client.get(url)['ETag']
+            for name, url in self.urls.items()}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Новый текст')
+
+    def test_comment_changes_post_etag(self):
+        url = self.urls['post_detail']
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Комментарий')
+
+    def test_etag_depends_on_page_and_user(self):
+        url = self.urls['index']
+        anonymous = self.client.get(url)['ETag']
+        second_page = self.client.get(url, {'page': 2})['ETag']
+        self.assertNotEqual(anonymous, second_page)
+        self.assertNotEqual(anonymous, self.authorized_client.get(url)['ETag'])
+
+    def test_follow_index_revalidates(self):
+        url = reverse('posts:follow_index')
+        etag, response = self.revalidate(self.authorized_client, url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый пост')
+
+    def test_missing_objects_are_not_found(self):
+        urls = [
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH='"x"')
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..counters import get_user_stats
+from ..models import Comment, Follow, Group, Post, User, UserStats
+
+POST_TEXT = 'Тестовый текст'
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        self.reader = User.objects.create(username='Reader')
+        self.group = Group.objects.create(
+            title='TestGroup',
+            slug='test-group',
+            description='test-description')
+        self.group2 = Group.objects.create(
+            title='TestGroup2',
+            slug='test-group-two',
+            description='test-description2')
+        self.post = Post.objects.create(
+            text=POST_TEXT,
+            author=self.user,
+            group=self.group)
+
+    def refresh(self, *objects):
+        for obj in objects:
+            obj.refresh_from_db()
+
+    def test_post_counters(self):
+        self.assertEqual(get_user_stats(self.user).posts_count, 1)
+        self.refresh(self.group)
+        self.assertEqual(self.group.posts_count, 1)
+        self.post.group = self.group2
+        self.post.save()
+        self.refresh(self.group, self.group2)
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.group2.posts_count, 1)
+        self.post.delete()
+        self.refresh(self.group2)
+        self.assertEqual(self.group2.posts_count, 0)
+        self.assertEqual(get_user_stats(self.user).posts_count, 0)
+
+    def test_comment_counters(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text=POST_TEXT)
+        self.refresh(self.post)
+        self.assertEqual(self.post.comments_count, 1)
+        comment.delete()
+        self.refresh(self.post)
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_follow_counters(self):
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(get_user_stats(self.user).followers_count, 1)
+        self.assertEqual(get_user_stats(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(get_user_stats(self.user).followers_count, 0)
+        self.assertEqual(get_user_stats(self.reader).following_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        Comment.objects.create(
+            post=self.post, author=self.reader, text=POST_TEXT)
+        Post.objects.update(comments_count=7)
+        Group.objects.update(posts_count=0)
+        UserStats.objects.filter(user=self.user).update(posts_count=5)
+        call_command('reconcile_counters', chunk_size=1, stdout=StringIO())
+        self.refresh(self.post, self.group)
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(get_user_stats(self.user).posts_count, 1)
+
+    def test_pages_do_not_count(self):
+        urls = [
+            reverse('posts:profile', kwargs={'username': 'HasNoName'}),
+            reverse('posts:group_list', kwargs={'slug': 'test-group'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                for query in context.captured_queries:
+                    self.assertNotIn('COUNT(', query['sql'])
@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import zipfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+from .utils import TempMediaMixin, make_jpeg
+
+
+@override_settings(EXPORT_CHUNK_SIZE=1)
+class ExportTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='HasNoName')
+        self.other = User.objects.create(username='Other')
+        group = Group.objects.create(title='Группа', slug='group')
+        image = make_jpeg('export.jpg', (12, 10))
+        self.post = Post.objects.create(
+            text='С картинкой', author=self.user, group=group, image=image)
+        self.copy = Post.objects.create(
+            text='Та же картинка', author=self.user,
+            image=make_jpeg('copy.jpg', (12, 10)))
+        Post.objects.create(text='Чужой пост', author=self.other)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Свой комментарий')
+        self.client.force_login(self.user)
+        self.url = reverse('posts:export')
+
+    def records(self, content):
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_ndjson(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        records = self.records(b''.join(response.streaming_content))
+        self.assertEqual(
+            [(record['kind'], record['text']) for record in records], [
+                ('post', 'С картинкой'), ('post', 'Та же картинка'),
+                ('comment', 'Свой комментарий')])
+        self.assertEqual(records[0]['group'], 'group')
+        self.assertEqual(records[2]['post'], self.post.pk)
+
+    def test_zip(self):
+        response = self.client.get(self.url, {'format': 'zip'})
+        self.assertIn('.zip', response['Content-Disposition'])
+        content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(
+                archive.namelist(), ['posts.ndjson', self.post.image.name])
+            self.assertEqual(
+                len(self.records(archive.read('posts.ndjson'))), 3)
+            with self.post.image.open('rb') as image:
+                self.assertEqual(
+                    archive.read(self.post.image.name), image.read())
+
+    def test_one_export_at_a_time(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.client.get(self.url).status_code, 429)
+        response.close()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_posts', 'HasNoName', stdout=out)
+        self.assertEqual(len(self.records(out.getvalue().encode())), 3)
+        path = os.path.join(self.media_root, 'export.zip')
+        call_command(
+            'export_posts', 'HasNoName', format='zip', output=path,
+            stdout=io.StringIO())
+        self.assertTrue(zipfile.is_zipfile(path))
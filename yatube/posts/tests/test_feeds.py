@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+@override_settings(SYNDICATION_ITEMS=2)
+class FeedsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='HasNoName')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}', author=self.user, group=self.group)
+        self.urls = (
+            reverse('posts:group_rss', kwargs={'slug': 'group'}),
+            reverse('posts:group_atom', kwargs={'slug': 'group'}),
+            reverse('posts:author_rss', kwargs={'username': 'HasNoName'}),
+            reverse('posts:author_atom', kwargs={'username': 'HasNoName'}),
+        )
+
+    def test_newest_posts(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Пост 2')
+                self.assertContains(response, 'Пост 1')
+                self.assertNotContains(response, 'Пост 0')
+
+    def test_cached_until_new_post(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(url)
+                # Кроме самой ленты читается только дата новейшего поста
+                # для Last-Modified
+                posts_queries = [
+                    query['sql'] for query in context.captured_queries
+                    if 'FROM "posts_post"' in query['sql']
+                    and '"posts_post"."text"' in query['sql']]
+                self.assertEqual(len(posts_queries), 1)
+                self.assertIn('JOIN "auth_user"', posts_queries[0])
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+        Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group)
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Новый пост')
+
+    def test_conditional_get(self):
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        for url in (self.urls[0], self.urls[2]):
+            with self.subTest(url=url):
+                last_modified = self.client.get(url)['Last-Modified']
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, 304)
+
+    def test_edit_and_delete_change_last_modified(self):
+        post = Post.objects.get(text='Пост 2')
+
+        def edit():
+            post.text = 'Исправленный'
+            post.save()
+
+        for change, text in ((edit, 'Исправленный'), (post.delete, 'Пост 0')):
+            with self.subTest(change=change.__name__):
+                seen = {url: self.client.get(url)['Last-Modified']
+                        for url in self.urls}
+                change()
+                for url, last_modified in seen.items():
+                    response = self.client.get(
+                        url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                    self.assertContains(response, text)
+
+    def test_group_rename_updates_author_feed(self):
+        url = self.urls[2]
+        self.assertContains(self.client.get(url), 'Группа')
+        self.group.title = 'Переименованная'
+        self.group.save()
+        self.assertContains(self.client.get(url), 'Переименованная')
+        self.group.delete()
+        self.assertNotContains(self.client.get(url), 'Переименованная')
+
+    def test_missing_group(self):
+        response = self.client.get(
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_pages_link_feeds(self):
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'group'}))
+        self.assertContains(response, self.urls[0])
@@ -1,21 +1,23 @@
-import shutil
-import tempfile
+import os
+from io import BytesIO, StringIO
 
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.conf import settings
+from PIL import Image
 
+from ..forms import PostForm
 from ..models import Group, Post, Comment, User
+from ..storage import post_image_storage
+from .utils import TempMediaMixin, make_jpeg
 
 POST_TEXT = 'Тестовый текст'
 EDIT_TEXT = 'New Тестовый текст'
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 COMMENT = 'Комментарий от души'
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class CreatePostTests(TestCase):
+class CreatePostTests(TempMediaMixin, TestCase):
     def setUp(self):
         self.authorized_client = Client()
         self.user = User.objects.create(username='HasNoName')
@@ -31,11 +33,6 @@ class CreatePostTests(TestCase):
         )
         self.post_count = Post.objects.count()
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def test_create_post(self):
         """Валидная форма создает запись Post."""
         form_data = {'text': POST_TEXT}
@@ -111,7 +108,20 @@ class CreatePostTests(TestCase):
         post = Post.objects.all().order_by('-id')[0]
         self.assertIsNotNone(post)
         self.assertEqual(post.text, EDIT_TEXT)
-        self.assertEqual(post.image, 'posts/small.gif')
+        self.assertRegex(
+            post.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$')
+
+    def test_identical_images_share_file(self):
+        names = []
+        for name in ('first.jpg', 'second.JPG'):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                {'text': POST_TEXT, 'image': make_jpeg(name, (10, 10))})
+            names.append(Post.objects.latest('id').image.name)
+        self.assertEqual(names[0], names[1])
+        directory = os.path.join(
+            self.media_root, os.path.dirname(names[0]))
+        self.assertEqual(os.listdir(directory), [os.path.basename(names[0])])
 
     def test_create_guest_post(self):
         form_data = {'text': POST_TEXT}
@@ -179,3 +189,97 @@ class CommentTests(TestCase):
         comment = self.post.comments.order_by('-id')[0]
         self.assertEquals(COMMENT, comment.text)
         self.assertEqual(Comment.objects.count(), self.comment_count + 1)
+
+
+class ImageUploadLimitsTests(TempMediaMixin, TestCase):
+    def make_form(self, image):
+        return PostForm(data={'text': POST_TEXT}, files={'image': image})
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_large_image_is_downscaled(self):
+        form = self.make_form(make_jpeg('large.jpg', (400, 200)))
+        self.assertTrue(form.is_valid(), form.errors)
+        image = form.cleaned_data['image']
+        with Image.open(image) as stored:
+            self.assertEqual(stored.size, (100, 50))
+            self.assertEqual(stored.format, 'JPEG')
+        self.assertEqual(image.name, 'large.jpg')
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_downscale_keeps_orientation_and_profile(self):
+        image = Image.new('RGB', (400, 200), 'red')
+        exif = image.getexif()
+        # Orientation = 6: снимок повёрнут камерой на 90°
+        exif[0x0112] = 6
+        # JPEG хранит профиль как есть, поэтому годятся любые байты
+        icc_profile = b'icc-profile'
+        buffer = BytesIO()
+        image.save(
+            buffer, format='JPEG', exif=exif.tobytes(),
+            icc_profile=icc_profile)
+        form = self.make_form(SimpleUploadedFile(
+            'photo.jpg', buffer.getvalue(), 'image/jpeg'))
+        self.assertTrue(form.is_valid(), form.errors)
+        with Image.open(form.cleaned_data['image']) as stored:
+            self.assertEqual(stored.size, (50, 100))
+            self.assertIn(stored.getexif().get(0x0112), (None, 1))
+            self.assertEqual(stored.info.get('icc_profile'), icc_profile)
+
+    @override_settings(POST_IMAGE_MAX_SIDE=100)
+    def test_small_image_is_kept(self):
+        upload = make_jpeg('small.jpg', (80, 40))
+        form = self.make_form(upload)
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    def test_image_metadata_is_saved(self):
+        user = User.objects.create(username='HasNoName')
+        form = self.make_form(make_jpeg('meta.jpg', (40, 30)))
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.save(commit=False)
+        post.author = user
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (40, 30, 'JPEG'))
+        self.assertEqual(post.image_size, post.image.size)
+
+    def test_backfill_image_metadata(self):
+        user = User.objects.create(username='HasNoName')
+        name = post_image_storage.save(
+            'posts/legacy.jpg', make_jpeg('legacy.jpg', (20, 10)))
+        post = Post.objects.create(text=POST_TEXT, author=user, image=name)
+        missing = Post.objects.create(
+            text=POST_TEXT, author=user, image='posts/missing.jpg')
+        call_command(
+            'backfill_image_metadata', chunk_size=1,
+            stdout=StringIO(), stderr=StringIO())
+        post.refresh_from_db()
+        missing.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (20, 10))
+        self.assertEqual(post.image_format, 'JPEG')
+        self.assertIsNone(missing.image_width)
+
+    @override_settings(POST_IMAGE_MAX_BYTES=10)
+    def test_file_size_limit(self):
+        form = self.make_form(make_jpeg('heavy.jpg', (10, 10)))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors.as_data()['image'][0].code, 'file_too_large')
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_pixel_limit(self):
+        buffer = BytesIO()
+        Image.new('RGB', (20, 10)).save(buffer, format='PNG')
+        uploads = (
+            make_jpeg('wide.jpg', (20, 10)),
+            SimpleUploadedFile('wide.png', buffer.getvalue(), 'image/png'),
+        )
+        for upload in uploads:
+            with self.subTest(name=upload.name):
+                form = self.make_form(upload)
+                self.assertFalse(form.is_valid())
+                self.assertEqual(
+                    form.errors.as_data()['image'][0].code,
+                    'too_many_pixels')
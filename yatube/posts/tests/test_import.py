@@ -0,0 +1,121 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import get_generations
+from ..counters import get_user_stats
+from ..importer import Importer
+from ..models import Comment, Follow, Group, Post, Timeline, User
+from ..storage import post_image_storage
+
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='HasNoName')
+        self.reader = User.objects.create(username='Reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_ndjson(self):
+        records = [
+            {'id': 100, 'text': 'Первый', 'author': 'HasNoName',
+             'group': 'group', 'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'id': 101, 'text': 'Второй', 'author': 'HasNoName'},
+            {'kind': 'comment', 'post': 100, 'text': 'Комментарий',
+             'author': 'Reader'},
+            {'text': 'Чужой', 'author': 'Nobody'},
+            {'kind': 'comment', 'post': 999, 'text': 'Мимо',
+             'author': 'Reader'},
+        ]
+        lines = [json.dumps(record, ensure_ascii=False) for record in records]
+        path = self.write('posts.ndjson', '\n'.join(lines + ['{oops']))
+        scopes = (
+            'follows', f'author:{self.author.pk}', f'group:{self.group.pk}',
+            'post:100')
+        before = get_generations(*scopes)
+        with CaptureQueriesContext(connection) as context:
+            out, err = self.run_import(path, batch_size=2)
+        self.assertIn('постов 2, комментариев 1; пропущено записей 3', out)
+        self.assertEqual(err.count('пропущена'), 3)
+        inserts = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "posts_post"')]
+        self.assertEqual(len(inserts), 1)
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.comments_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(get_user_stats(self.author).posts_count, 2)
+        self.assertEqual(
+            Timeline.objects.filter(user=self.reader).count(), 2)
+        for scope, old, new in zip(scopes, before, get_generations(*scopes)):
+            self.assertNotEqual(old, new, scope)
+        new = Post.objects.create(text='После импорта', author=self.author)
+        self.assertGreater(new.pk, 101)
+
+    def test_csv(self):
+        path = self.write(
+            'posts.csv',
+            'kind,id,text,author,group,pub_date,post\n'
+            'post,,Из CSV,HasNoName,group,,\n'
+            'comment,,Ответ,Reader,,,{}\n'.format(
+                Post.objects.create(text='Есть', author=self.author).pk))
+        out, _ = self.run_import(path)
+        self.assertIn('постов 1, комментариев 1; пропущено записей 0', out)
+        self.assertTrue(Post.objects.filter(
+            text='Из CSV', group=self.group).exists())
+        self.assertTrue(Comment.objects.filter(text='Ответ').exists())
+
+    def test_duplicate_ids_stop_import(self):
+        Post.objects.create(pk=5, text='Был', author=self.author)
+        path = self.write('posts.ndjson', json.dumps(
+            {'id': 5, 'text': 'Дубль', 'author': 'HasNoName'}))
+        with self.assertRaises(CommandError):
+            self.run_import(path)
+        self.assertEqual(Post.objects.get(pk=5).text, 'Был')
+
+    def test_existing_images_are_kept(self):
+        with override_settings(MEDIA_ROOT=self.directory.name):
+            name = post_image_storage.save(
+                'posts/kept.gif', ContentFile(b'GIF89a', 'kept.gif'))
+            lines = [
+                json.dumps({'text': 'С картинкой', 'author': 'HasNoName',
+                            'image': name}),
+                json.dumps({'text': 'Без файла', 'author': 'HasNoName',
+                            'image': 'posts/00/missing.gif'}),
+            ]
+            path = self.write('posts.ndjson', '\n'.join(lines))
+            out, err = self.run_import(path)
+        self.assertIn('постов 1, комментариев 0; пропущено записей 1', out)
+        self.assertIn('posts/00/missing.gif', err)
+        self.assertEqual(Post.objects.get().image.name, name)
+
+    def test_image_checks_are_not_kept_between_batches(self):
+        importer = Importer(1, lambda number, message: None)
+        with override_settings(MEDIA_ROOT=self.directory.name):
+            for number in range(3):
+                importer.add(number, {
+                    'text': 'Пост', 'author': 'HasNoName',
+                    'image': f'posts/00/missing{number}.gif'})
+        self.assertLessEqual(len(importer.images), 1)
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Post, User
+from ..storage import post_image_storage
+from ..thumbnails import generate_thumbnails, lookup_thumbnail
+from .utils import TempMediaMixin, make_jpeg
+
+POST_TEXT = 'Тестовый текст'
+
+
+class MediaGarbageTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(username='HasNoName')
+        self.kept = Post.objects.create(
+            text=POST_TEXT, author=user,
+            image=make_jpeg('kept.jpg', (10, 10)))
+        orphan = Post.objects.create(
+            text=POST_TEXT, author=user,
+            image=make_jpeg('orphan.jpg', (20, 10)))
+        generate_thumbnails(self.kept.image.name)
+        generate_thumbnails(orphan.image.name)
+        self.kept_thumbnail = lookup_thumbnail(self.kept.image, 'card')
+        self.orphan_thumbnail = lookup_thumbnail(orphan.image, 'card')
+        self.orphan_name = orphan.image.name
+        orphan.delete()
+        self.stray = post_image_storage.save(
+            'cache/00/00/stray.jpg', make_jpeg('stray.jpg', (5, 5)))
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def collect(self, **options):
+        call_command(
+            'collect_media_garbage', min_age=0, batch_size=1,
+            stdout=StringIO(), **options)
+
+    def test_dry_run_keeps_files(self):
+        self.collect(dry_run=True)
+        self.assertTrue(self.exists(self.orphan_name))
+        self.assertTrue(self.exists(self.stray))
+
+    def test_unreferenced_files_are_deleted(self):
+        self.collect()
+        self.assertTrue(self.exists(self.kept.image.name))
+        self.assertTrue(self.exists(self.kept_thumbnail.name))
+        self.assertFalse(self.exists(self.orphan_name))
+        self.assertFalse(self.exists(self.orphan_thumbnail.name))
+        self.assertFalse(self.exists(self.stray))
+
+    def test_quarantine(self):
+        quarantine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, quarantine, ignore_errors=True)
+        self.collect(quarantine=quarantine)
+        self.assertFalse(self.exists(self.orphan_name))
+        self.assertTrue(
+            os.path.exists(os.path.join(quarantine, self.orphan_name)))
+
+    def test_duplicate_upload_refreshes_mtime(self):
+        path = os.path.join(self.media_root, self.kept.image.name)
+        os.utime(path, (0, 0))
+        with open(path, 'rb') as file:
+            name = post_image_storage.save('posts/again.jpg', file)
+        self.assertEqual(name, self.kept.image.name)
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_recent_files_are_skipped(self):
+        call_command('collect_media_garbage', stdout=StringIO())
+        self.assertTrue(self.exists(self.orphan_name))
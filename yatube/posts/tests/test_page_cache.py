@@ -0,0 +1,68 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+POST_TEXT = 'Тестовый текст'
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        self.group = Group.objects.create(
+            title='TestGroup',
+            slug='test-group',
+            description='test-description')
+        self.group2 = Group.objects.create(
+            title='TestGroup2',
+            slug='test-group-two',
+            description='test-description2')
+        self.post = Post.objects.create(
+            text=POST_TEXT,
+            author=self.user,
+            group=self.group)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.user.username}),
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}),
+        }
+
+    def test_repeat_visit_skips_database(self):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_authorized_requests_are_not_cached(self):
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        authorized_client.get(self.urls['index'])
+        response = authorized_client.get(self.urls['index'])
+        self.assertIsNotNone(response.context)
+
+    def test_post_save_purges_only_its_tags(self):
+        other_group = reverse(
+            'posts:group_list', kwargs={'slug': self.group2.slug})
+        self.client.get(other_group)
+        for url in self.urls.values():
+            self.client.get(url)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        with self.assertNumQueries(0):
+            self.client.get(other_group)
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                self.assertContains(self.client.get(url), 'Новый текст')
+
+    def test_comment_purges_post_page(self):
+        self.client.get(self.urls['post_detail'])
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        response = self.client.get(self.urls['post_detail'])
+        self.assertContains(response, 'Комментарий')
@@ -0,0 +1,168 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, User
+from ..paginators import (ELLIPSIS, CachedCountPaginator, CursorPaginator,
+                          decode_cursor, elided_page_range, encode_cursor)
+
+POST_TEXT = 'Тестовый текст'
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        self.all_posts = 25
+        Post.objects.bulk_create(
+            Post(text=POST_TEXT, author=self.user)
+            for _ in range(self.all_posts))
+        # Одинаковые даты: порядок внутри них задаёт id
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        self.expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True))
+
+    def test_cursor_roundtrip(self):
+        post = Post.objects.first()
+        token = encode_cursor(post.pub_date, post.id)
+        self.assertEqual(decode_cursor(token), (post.pub_date, post.id))
+
+    def test_walk_forward_and_back(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        seen = []
+        page = paginator.get_page()
+        pages = [page]
+        self.assertFalse(page.has_previous())
+        seen.extend(post.id for post in page)
+        while page.has_next():
+            page = paginator.get_page(after=page.next_cursor)
+            pages.append(page)
+            seen.extend(post.id for post in page)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+
+        previous = paginator.get_page(before=pages[-1].previous_cursor)
+        self.assertEqual(
+            [post.id for post in previous],
+            [post.id for post in pages[-2]])
+
+    def test_no_count_queries(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.get_page()
+        with self.assertNumQueries(1) as context:
+            paginator.get_page(after=first.next_cursor)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(after='not-a-cursor')
+        self.assertEqual(page[0].id, self.expected[0])
+
+    @override_settings(FEED_PAGINATION='cursor')
+    def test_index_cursor_mode(self):
+        response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), settings.MAX_RECORDS_PER_PAGE)
+        self.assertContains(response, f'?after={page_obj.next_cursor}')
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'HasNoName'}),
+            {'after': page_obj.next_cursor})
+        self.assertEqual(
+            [post.id for post in response.context['page_obj']],
+            self.expected[10:20])
+
+
+class ElidedPageRangeTests(SimpleTestCase):
+    def window(self, number, count):
+        page = Paginator(range(count), 1).page(number)
+        return list(elided_page_range(page, on_each_side=2, on_ends=1))
+
+    def test_short_range_not_elided(self):
+        self.assertEqual(self.window(3, 7), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_middle_page(self):
+        self.assertEqual(
+            self.window(500, 10000),
+            [1, ELLIPSIS, 498, 499, 500, 501, 502, ELLIPSIS, 10000])
+
+    def test_edges(self):
+        self.assertEqual(
+            self.window(1, 10000), [1, 2, 3, ELLIPSIS, 10000])
+        self.assertEqual(
+            self.window(10000, 10000), [1, ELLIPSIS, 9998, 9999, 10000])
+
+    def test_window_size_is_bounded(self):
+        for count in (10, 100, 100000):
+            for number in (1, count // 2, count):
+                with self.subTest(count=count, number=number):
+                    self.assertLessEqual(len(self.window(number, count)), 9)
+
+
+class CachedCountPaginatorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        for _ in range(3):
+            Post.objects.create(text=POST_TEXT, author=self.user)
+
+    def count_queries(self, context):
+        return [
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']]
+
+    def test_count_is_cached(self):
+        queryset = Post.objects.filter(author=self.user)
+        self.assertEqual(CachedCountPaginator(queryset, 10).count, 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedCountPaginator(queryset, 10).count, 3)
+
+    def test_count_invalidated_on_save_and_delete(self):
+        queryset = Post.objects.filter(author=self.user)
+        self.assertEqual(CachedCountPaginator(queryset, 10).count, 3)
+        post = Post.objects.create(text=POST_TEXT, author=self.user)
+        self.assertEqual(CachedCountPaginator(queryset, 10).count, 4)
+        post.delete()
+        self.assertEqual(CachedCountPaginator(queryset, 10).count, 3)
+
+    @override_settings(FEED_COUNT_APPROXIMATE_ABOVE=1)
+    def test_approximate_count_from_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = CachedCountPaginator(
+            Post.objects.all(), 10, approximate=True)
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.count_is_approximate)
+
+    @override_settings(FEED_COUNT_APPROXIMATE_ABOVE=1)
+    def test_stale_estimate_falls_back_to_exact_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Post.objects.bulk_create(
+            Post(text=POST_TEXT, author=self.user) for _ in range(22))
+        paginator = CachedCountPaginator(
+            Post.objects.all(), 10, approximate=True)
+        self.assertEqual(len(paginator.page(3)), 5)
+        self.assertEqual(paginator.count, 25)
+        self.assertFalse(paginator.count_is_approximate)
+
+    @override_settings(FEED_COUNT_APPROXIMATE_ABOVE=1)
+    def test_approximate_last_page_is_marked(self):
+        Post.objects.bulk_create(
+            Post(text=POST_TEXT, author=self.user) for _ in range(22))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '≈3</a>')
+
+    def test_index_counts_once(self):
+        url = reverse('posts:index')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertEqual(len(self.count_queries(context)), 1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertEqual(len(self.count_queries(context)), 0)
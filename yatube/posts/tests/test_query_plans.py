@@ -0,0 +1,68 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..paginators import encode_cursor
+
+POST_TEXT = 'Тестовый текст'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN - SQLite')
+class QueryPlanTests(TestCase):
+    """Запросы страниц не должны сканировать таблицы и сортировать
+    во временном B-дереве."""
+
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        self.author = User.objects.create(username='Author')
+        self.group = Group.objects.create(
+            title='TestGroup',
+            slug='test-group',
+            description='test-description')
+        Follow.objects.create(user=self.user, author=self.author)
+        for author in (self.user, self.author):
+            for _ in range(3):
+                self.post = Post.objects.create(
+                    text=POST_TEXT, author=author, group=self.group)
+        Comment.objects.create(
+            post=self.post, author=self.user, text=POST_TEXT)
+        self.client.force_login(self.user)
+
+    def bad_plan_lines(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            details = [row[-1] for row in cursor.fetchall()]
+        return [
+            detail for detail in details
+            if 'TEMP B-TREE' in detail
+            or (detail.startswith('SCAN') and 'USING' not in detail)
+        ]
+
+    def assert_plans(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'sqlite_' in sql:
+                continue
+            with self.subTest(url=url, sql=sql):
+                self.assertEqual(self.bad_plan_lines(sql, ()), [])
+
+    def test_feed_plans(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+        cursor = encode_cursor(self.post.pub_date, self.post.id)
+        for url in urls:
+            self.assert_plans(url)
+            self.assert_plans(url, page=2)
+            self.assert_plans(url, after=cursor)
@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import get_generations
+from ..models import Group, Post, User
+from ..regroup import move_posts
+
+
+class MovePostsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        self.source = Group.objects.create(title='Откуда', slug='source')
+        self.target = Group.objects.create(title='Куда', slug='target')
+        for number in range(5):
+            Post.objects.create(
+                text=f'Пост {number}', author=self.user, group=self.source)
+        Post.objects.create(text='Без группы', author=self.user)
+
+    def counts(self):
+        self.source.refresh_from_db()
+        self.target.refresh_from_db()
+        return self.source.posts_count, self.target.posts_count
+
+    def test_moves_in_chunks(self):
+        scopes = (
+            'posts', f'author:{self.user.pk}', f'group:{self.source.pk}',
+            f'group:{self.target.pk}')
+        before = get_generations(*scopes)
+        post_scope = f'post:{Post.objects.first().pk}'
+        post_generation = get_generations(post_scope)
+        with CaptureQueriesContext(connection) as context:
+            moved = list(move_posts(
+                Post.objects.filter(group=self.source), self.target.pk, 2))
+        self.assertEqual(moved, [2, 2, 1])
+        updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "posts_post"')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(self.target.posts.count(), 5)
+        self.assertEqual(self.counts(), (0, 5))
+        after = get_generations(*scopes)
+        self.assertTrue(all(old != new for old, new in zip(before, after)))
+        # Страницу поста сбрасывает поколение автора
+        self.assertEqual(get_generations(post_scope), post_generation)
+
+    def test_ungroup(self):
+        self.assertEqual(sum(move_posts(Post.objects.all(), None, 10)), 5)
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            'move_posts', from_group='source', to_group='target',
+            chunk_size=3, stdout=out)
+        self.assertIn('перенесено постов 5', out.getvalue())
+        self.assertEqual(self.counts(), (0, 5))
+        with self.assertRaises(CommandError):
+            call_command('move_posts', to_group='target', stdout=out)
+        with self.assertRaises(CommandError):
+            call_command(
+                'move_posts', author='HasNoName', to_group='missing',
+                stdout=out)
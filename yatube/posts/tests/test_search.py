@@ -0,0 +1,61 @@
+from django.contrib.admin.sites import site
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..search import decode_search_cursor, search_posts
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='HasNoName')
+        self.exact = Post.objects.create(
+            text='Ёжик в тумане', author=self.user)
+        self.commented = Post.objects.create(
+            text='Прогулка по лесу', author=self.user)
+        Comment.objects.create(
+            post=self.commented, author=self.user, text='Там был ёжик')
+        self.other = Post.objects.create(
+            text='Совсем другое', author=self.user)
+
+    def test_posts_and_comments_are_ranked(self):
+        posts, next_cursor = search_posts('ежик')
+        self.assertEqual(posts, [self.exact, self.commented])
+        self.assertIsNone(next_cursor)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.text = 'Другой ёжик'
+        self.other.save()
+        self.exact.delete()
+        posts, _ = search_posts('ёжик')
+        self.assertCountEqual(posts, [self.other, self.commented])
+
+    def test_cursor_pagination(self):
+        first, cursor = search_posts('ёжик', limit=1)
+        self.assertEqual(first, [self.exact])
+        second, cursor = search_posts(
+            'ёжик', after=decode_search_cursor(cursor), limit=1)
+        self.assertEqual(second, [self.commented])
+        self.assertIsNone(cursor)
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(search_posts('"ёжик AND OR (')[0], [])
+
+    @override_settings(MAX_RECORDS_PER_PAGE=1)
+    def test_search_page(self):
+        url = reverse('posts:search')
+        response = self.client.get(url, {'q': 'ёжик'})
+        self.assertEqual(response.context['posts'], [self.exact])
+        response = self.client.get(
+            url, {'q': 'ёжик', 'after': response.context['next_cursor']})
+        self.assertEqual(response.context['posts'], [self.commented])
+        response = self.client.get(url, {'q': 'ёжик', 'after': '!!'})
+        self.assertEqual(response.context['posts'], [self.exact])
+
+    def test_admin_search_uses_index(self):
+        model_admin = site._registry[Post]
+        request = RequestFactory().get('/')
+        queryset, distinct = model_admin.get_search_results(
+            request, Post.objects.all(), 'тумане')
+        self.assertEqual(list(queryset), [self.exact])
+        self.assertIn('posts_post_fts', str(queryset.query))
@@ -0,0 +1,150 @@
+import os
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cache import get_generations
+from ..models import Post, User
+from ..thumbnails import generate_thumbnails, lookup_thumbnail
+from .utils import TempMediaMixin, make_jpeg
+
+POST_TEXT = 'Тестовый текст'
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class ThumbnailPipelineTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='HasNoName')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, name):
+        return SimpleUploadedFile(
+            name=name, content=SMALL_GIF, content_type='image/gif')
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_upload_generates_thumbnails(self):
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': POST_TEXT, 'image': self.upload('eager.gif')})
+        post = Post.objects.get()
+        thumbnail = lookup_thumbnail(post.image, 'card')
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, thumbnail.url)
+
+    def test_page_does_not_render_missing_thumbnail(self):
+        post = Post.objects.create(
+            text=POST_TEXT, author=self.user, image=self.upload('lazy.gif'))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, f'src="{post.image.url}"')
+        self.assertIsNone(lookup_thumbnail(post.image, 'card'))
+
+    @override_settings(THUMBNAIL_WORKERS=0)
+    def test_failed_image_is_not_retried_on_every_render(self):
+        with self.assertLogs('posts.thumbnails', 'ERROR') as logs:
+            post = Post.objects.create(
+                text=POST_TEXT, author=self.user, image=SimpleUploadedFile(
+                    'broken.gif', b'not an image', content_type='image/gif'))
+            self.client.get(reverse('posts:index'))
+            self.client.get(reverse('posts:profile', kwargs={
+                'username': self.user.username}))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsNone(lookup_thumbnail(post.image, 'card'))
+
+    def test_page_reads_thumbnails_in_one_query(self):
+        posts = [
+            Post.objects.create(
+                text=POST_TEXT, author=self.user,
+                image=make_jpeg(f'batch{number}.jpg', (10 + number, 10)))
+            for number in range(3)]
+        for post in posts:
+            generate_thumbnails(post.image.name)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('posts:index'))
+        kvstore_queries = [
+            query for query in context.captured_queries
+            if 'thumbnail_kvstore' in query['sql']]
+        self.assertEqual(len(kvstore_queries), 1)
+        for post in posts:
+            self.assertContains(
+                response, lookup_thumbnail(post.image, 'card').url)
+
+    @override_settings(
+        THUMBNAIL_WORKERS=0,
+        POST_THUMBNAILS={
+            'card': ('960x339', {'crop': 'center', 'upscale': True}),
+            'card_480': ('480x170', {
+                'crop': 'center', 'upscale': True, 'format': 'PNG'}),
+        },
+        POST_THUMBNAIL_SRCSET={'card': ('card_480',)})
+    def test_card_lists_variants_in_srcset(self):
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': POST_TEXT,
+             'image': make_jpeg('variants.jpg', (600, 300))})
+        post = Post.objects.get()
+        variant = lookup_thumbnail(post.image, 'card_480')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response,
+            f'<source type="image/png" srcset="{variant.url} 480w"')
+        self.assertContains(
+            response, lookup_thumbnail(post.image, 'card').url)
+
+    @override_settings(
+        THUMBNAIL_WORKERS=0,
+        POST_THUMBNAILS={
+            'card': ('960x339', {'crop': 'center', 'upscale': True}),
+            'card_480': ('480x170', {'crop': 'center', 'upscale': True}),
+        },
+        POST_THUMBNAIL_SRCSET={'card': ('card_480',)})
+    def test_srcset_skips_variants_wider_than_original(self):
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': POST_TEXT, 'image': self.upload('tiny.gif')})
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, '<source')
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_rebuild_command(self):
+        posts = [
+            Post.objects.create(
+                text=POST_TEXT, author=self.user,
+                image=make_jpeg(f'rebuild{number}.jpg', (10 + number, 10)))
+            for number in range(3)]
+        state_file = os.path.join(self.media_root, 'rebuild.state')
+        with open(state_file, 'w') as file:
+            file.write(str(posts[0].pk))
+        scopes = [f'post:{post.pk}' for post in posts]
+        before = get_generations(*scopes)
+        output = StringIO()
+        call_command(
+            'rebuild_thumbnails', workers=0, chunk_size=1,
+            state_file=state_file, resume=True, stdout=output)
+        after = get_generations(*scopes)
+        self.assertEqual(before[0], after[0])
+        for old, new in zip(before[1:], after[1:]):
+            self.assertNotEqual(old, new)
+        self.assertIsNone(lookup_thumbnail(posts[0].image, 'card'))
+        for post in posts[1:]:
+            self.assertIsNotNone(lookup_thumbnail(post.image, 'card'))
+        self.assertIn('Обработано постов 2 из 2', output.getvalue())
+        with open(state_file) as file:
+            self.assertEqual(file.read(), str(posts[-1].pk))
@@ -0,0 +1,131 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, HeavyAuthor, Post, Timeline, User
+from ..paginators import CursorPaginator
+from ..timeline import FollowFeed
+
+POST_TEXT = 'Тестовый текст'
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='Author')
+        self.follower = User.objects.create(username='Follower')
+        self.old_post = Post.objects.create(
+            author=self.author,
+            text=POST_TEXT,
+        )
+
+    def timeline_posts(self, user):
+        return list(
+            Timeline.objects.filter(user=user)
+            .values_list('post_id', flat=True))
+
+    def test_follow_backfills_timeline(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(
+            self.timeline_posts(self.follower), [self.old_post.id])
+
+    def test_new_post_fans_out(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(author=self.author, text=POST_TEXT)
+        self.assertEqual(
+            self.timeline_posts(self.follower),
+            [post.id, self.old_post.id])
+        self.assertEqual(Timeline.objects.get(post=post).pub_date,
+                         post.pub_date)
+
+    def test_unfollow_and_delete_prune(self):
+        follow = Follow.objects.create(
+            user=self.follower, author=self.author)
+        post = Post.objects.create(author=self.author, text=POST_TEXT)
+        post.delete()
+        self.assertEqual(
+            self.timeline_posts(self.follower), [self.old_post.id])
+        follow.delete()
+        self.assertEqual(self.timeline_posts(self.follower), [])
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        stranger = User.objects.create(username='Stranger')
+        Timeline.objects.create(
+            user=stranger, post=self.old_post,
+            pub_date=self.old_post.pub_date)
+        Timeline.objects.filter(user=self.follower).delete()
+        call_command('rebuild_timelines', chunk_size=1, stdout=StringIO())
+        self.assertEqual(
+            self.timeline_posts(self.follower), [self.old_post.id])
+        self.assertEqual(self.timeline_posts(stranger), [])
+
+    def test_feed_slice_without_heavy_authors(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=POST_TEXT)
+            for _ in range(3)]
+        feed = FollowFeed(self.follower)
+        self.assertEqual(feed.heavy_author_ids, [])
+        with self.assertNumQueries(1):
+            self.assertEqual(feed[1:3], [posts[1], posts[0]])
+
+    def test_follow_index_reads_timeline(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.client.force_login(self.follower)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.old_post])
+
+
+@override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=2)
+class HybridFanOutTests(TestCase):
+    def setUp(self):
+        self.star = User.objects.create(username='Star')
+        self.author = User.objects.create(username='Author')
+        self.follower = User.objects.create(username='Follower')
+        self.fan = User.objects.create(username='Fan')
+        for user in (self.follower, self.fan):
+            Follow.objects.create(user=user, author=self.star)
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.posts = []
+        for author in (self.star, self.author) * 3:
+            self.posts.append(
+                Post.objects.create(author=author, text=POST_TEXT))
+        self.posts.reverse()
+
+    def test_heavy_author_is_not_fanned_out(self):
+        self.assertTrue(
+            HeavyAuthor.objects.filter(author=self.star).exists())
+        self.assertFalse(
+            Timeline.objects.filter(post__author=self.star).exists())
+        self.assertEqual(
+            Timeline.objects.filter(user=self.follower).count(), 3)
+
+    def test_feed_merges_heavy_authors(self):
+        feed = FollowFeed(self.follower)
+        self.assertEqual(feed.count(), 6)
+        self.assertEqual(feed[0:6], self.posts)
+        with self.assertNumQueries(3):
+            self.assertEqual(feed[2:4], self.posts[2:4])
+
+    def test_feed_skips_duplicates(self):
+        post = self.posts[1]
+        Timeline.objects.create(
+            user=self.follower, post=post, pub_date=post.pub_date)
+        self.assertEqual(FollowFeed(self.follower)[0:6], self.posts)
+
+    def test_feed_cursor_pages(self):
+        paginator = CursorPaginator(FollowFeed(self.follower), 4)
+        first = paginator.get_page()
+        second = paginator.get_page(after=first.next_cursor)
+        self.assertEqual(list(first) + list(second), self.posts)
+        self.assertFalse(second.has_next())
+
+    def test_follow_index_shows_heavy_posts(self):
+        self.client.force_login(self.fan)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [post for post in self.posts if post.author == self.star])
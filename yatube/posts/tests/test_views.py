@@ -6,7 +6,6 @@ from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django import forms
-from django.core.cache import cache
 
 from ..models import Follow, Group, Post, User
 
@@ -308,14 +307,27 @@ class GroupPostTests(TestCase):
         )
         response = self.client.get(reverse('posts:index'))
         memorised_content = response.content
+        # update() не шлёт сигналов: фрагмент остаётся в кеше
+        Post.objects.filter(pk=delete_post.pk).update(text='Другой текст')
+        cached_response = self.client.get(reverse('posts:index'))
+        self.assertEqual(memorised_content, cached_response.content)
+        # Удаление через ORM сдвигает поколение ленты и сбрасывает фрагмент
         delete_post.delete()
         update_response = self.client.get(reverse('posts:index'))
-        new_content = update_response.content
-        self.assertEqual(memorised_content, new_content)
-        cache.clear()
-        clear_response = self.client.get(reverse('posts:index'))
-        clear_cache = clear_response.content
-        self.assertNotEqual(memorised_content, clear_cache)
+        self.assertNotEqual(memorised_content, update_response.content)
+        self.assertNotContains(update_response, 'Другой текст')
+
+    def test_index_cache_is_page_aware(self):
+        for _ in range(settings.MAX_RECORDS_PER_PAGE):
+            Post.objects.create(
+                text='Текст первой страницы',
+                author=self.user,
+            )
+        first_page = self.client.get(reverse('posts:index'))
+        second_page = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertContains(first_page, 'Текст первой страницы')
+        self.assertNotContains(second_page, 'Текст первой страницы')
+        self.assertContains(second_page, POST_TEXT)
 
 
 class FollowingTests(TestCase):
@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+
+def make_jpeg(name, size):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, format='JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+class TempMediaMixin:
+    """Свой временный MEDIA_ROOT на время класса тестов.
+
+    Каталог создаётся в setUpClass, а не при импорте модуля, поэтому
+    его не оставляют классы, которые не запускались.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls._media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls._media_settings.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._remove_media()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._remove_media()
+
+    @classmethod
+    def _remove_media(cls):
+        cls._media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
@@ -0,0 +1,217 @@
+"""Миниатюры изображений постов, подготовленные заранее.
+
+Геометрии миниатюр перечислены в settings.POST_THUMBNAILS. После
+сохранения поста с новым изображением они ставятся в очередь пулу
+потоков, а шаблоны только ищут готовую миниатюру в key-value хранилище
+sorl-thumbnail и не декодируют изображение во время запроса.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from PIL import Image
+from sorl.thumbnail import default, delete, get_thumbnail
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .cache import bump_generation, post_scopes
+from .storage import post_image_storage
+
+logger = logging.getLogger(__name__)
+
+FAILED_KEY = 'posts:thumbnails:failed:{}'
+
+_pool = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails')
+    return _pool
+
+
+def _thumbnail_options(source, options):
+    # Те же умолчания, что подставляет ThumbnailBackend.get_thumbnail:
+    # от них зависит имя файла миниатюры
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(thumbnail_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def _thumbnail_file(image, alias):
+    geometry, options = settings.POST_THUMBNAILS[alias]
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, geometry, _thumbnail_options(source, options))
+    return ImageFile(name, default.storage)
+
+
+def supported_aliases(aliases=None):
+    """Миниатюры, формат которых умеет сохранять установленный Pillow.
+
+    Например, WebP-варианты пропускаются, если Pillow собран без libwebp.
+    """
+    if aliases is None:
+        aliases = settings.POST_THUMBNAILS
+    Image.init()
+    return [
+        alias for alias in aliases
+        if settings.POST_THUMBNAILS[alias][1].get('format', 'JPEG')
+        in Image.SAVE]
+
+
+def lookup_thumbnail(image, alias):
+    """Готовая миниатюра image или None; сама миниатюру не создаёт."""
+    return default.kvstore.get(_thumbnail_file(image, alias))
+
+
+def lookup_thumbnails(images, aliases):
+    """Готовые миниатюры нескольких изображений.
+
+    Возвращает словарь (имя изображения, alias) -> миниатюра или None.
+    Для хранилища cached_db это одно чтение get_many из кеша и не больше
+    одного запроса к таблице sorl-thumbnail вместо запроса на каждую
+    миниатюру.
+    """
+    images = [image for image in images if image]
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBKVStore):
+        return {
+            (image.name, alias): lookup_thumbnail(image, alias)
+            for image in images for alias in aliases}
+    keys = {
+        (image.name, alias): add_prefix(_thumbnail_file(image, alias).key)
+        for image in images for alias in aliases}
+    found = kvstore.cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in found]
+    if missing:
+        rows = dict(KVStoreModel.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        loaded = {key: rows.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            loaded, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(loaded)
+    return {
+        pair: None if found[key] == EMPTY_VALUE
+        else deserialize_image_file(found[key])
+        for pair, key in keys.items()}
+
+
+def picture_aliases(alias):
+    """Миниатюры, нужные для <picture>: сама alias и её варианты srcset."""
+    return [alias, *supported_aliases(
+        settings.POST_THUMBNAIL_SRCSET.get(alias, ()))]
+
+
+def prefetch_thumbnails(posts, alias):
+    """Запоминает у постов готовые миниатюры для post_picture."""
+    posts = [post for post in posts if post.image]
+    aliases = picture_aliases(alias)
+    thumbnails = lookup_thumbnails((post.image for post in posts), aliases)
+    for post in posts:
+        prefetched = getattr(post, 'prefetched_thumbnails', {})
+        for name in aliases:
+            prefetched[name] = thumbnails[post.image.name, name]
+        post.prefetched_thumbnails = prefetched
+
+
+def _failed_key(name):
+    return FAILED_KEY.format(hashlib.md5(name.encode()).hexdigest())
+
+
+def generate_thumbnails(name, scopes=()):
+    """Создаёт все миниатюры изображения name из POST_THUMBNAILS.
+
+    Затем сдвигает поколения scopes: закешированные страницы могли
+    сохранить исходное изображение вместо миниатюры. Возвращает True,
+    если все миниатюры готовы. Неудача запоминается на
+    THUMBNAIL_RETRY_DELAY секунд, и enqueue_thumbnails() до тех пор
+    изображение в очередь не ставит.
+    """
+    source = ImageFile(name, post_image_storage)
+    try:
+        for alias in supported_aliases():
+            geometry, options = settings.POST_THUMBNAILS[alias]
+            thumbnail = get_thumbnail(source, geometry, **options)
+            # Ошибку Pillow sorl-thumbnail только пишет в лог и отдаёт
+            # несохранённую миниатюру
+            if not thumbnail.exists():
+                raise OSError(f'миниатюра {alias} не создана')
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        cache.set(_failed_key(name), True, settings.THUMBNAIL_RETRY_DELAY)
+        return False
+    if scopes:
+        bump_generation(*scopes)
+    return True
+
+
+def rebuild_thumbnails(name, force=False):
+    """Пересоздаёт миниатюры name; с force сначала удаляет готовые."""
+    if force:
+        delete(ImageFile(name, post_image_storage), delete_file=False)
+    return name, generate_thumbnails(name)
+
+
+def _run_in_worker(name, scopes):
+    try:
+        generate_thumbnails(name, scopes)
+    finally:
+        with _pending_lock:
+            _pending.discard(name)
+        # У потока пула свои соединения с БД
+        connections.close_all()
+
+
+def _submit(name, scopes):
+    with _pending_lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    _get_pool().submit(_run_in_worker, name, scopes)
+
+
+def enqueue_thumbnails(image):
+    """Ставит миниатюры image в очередь после фиксации транзакции.
+
+    Изображение, уже стоящее в очереди или недавно не обработанное,
+    повторно не добавляется. При THUMBNAIL_WORKERS = 0 миниатюры
+    создаются сразу.
+    """
+    if not image:
+        return
+    name = image.name
+    # Иначе каждый показ битой картинки снова декодировал бы её
+    if cache.get(_failed_key(name)):
+        return
+    post = getattr(image, 'instance', None)
+    scopes = ()
+    if getattr(post, 'pk', None) is not None:
+        scopes = tuple(post_scopes(
+            post.author_id, post.group_id, post_id=post.pk))
+    if not settings.THUMBNAIL_WORKERS:
+        generate_thumbnails(name, scopes)
+        return
+    transaction.on_commit(lambda: _submit(name, scopes))
@@ -0,0 +1,226 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Каждый пост автора раскладывается строками Timeline по его подписчикам,
+поэтому follow_index читает ленту одним проходом по индексу
+(user, -pub_date, -post) вместо соединения Post, User и Follow.
+
+Посты авторов с большим числом подписчиков (HeavyAuthor) не
+раскладываются: FollowFeed подмешивает их при чтении слиянием
+отсортированных потоков по индексу (author, -pub_date).
+"""
+import heapq
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import cached_count
+from .models import Follow, HeavyAuthor, Post, Timeline
+from .paginators import keyset
+
+
+def _bulk_insert(rows, batch_size=None):
+    Timeline.objects.bulk_create(
+        rows,
+        batch_size=batch_size or settings.TIMELINE_CHUNK_SIZE,
+        ignore_conflicts=True)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def has_many_followers(author_id):
+    """Достиг ли автор порога подписчиков, без полного COUNT(*)."""
+    threshold = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    return Follow.objects.filter(author_id=author_id).order_by().values(
+        'id')[threshold - 1:threshold].exists()
+
+
+def is_heavy(author_id):
+    """Проверяет и при необходимости ставит отметку HeavyAuthor."""
+    if HeavyAuthor.objects.filter(author_id=author_id).exists():
+        return True
+    if has_many_followers(author_id):
+        HeavyAuthor.objects.get_or_create(author_id=author_id)
+        return True
+    return False
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    if is_heavy(post.author_id):
+        return
+    chunk_size = settings.TIMELINE_CHUNK_SIZE
+    followers = (
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+        .iterator(chunk_size=chunk_size))
+    with transaction.atomic():
+        for user_ids in _chunks(followers, chunk_size):
+            _bulk_insert(
+                Timeline(user_id=user_id, post_id=post.id,
+                         pub_date=post.pub_date)
+                for user_id in user_ids)
+
+
+def backfill_follow(user_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные посты автора."""
+    if HeavyAuthor.objects.filter(author_id=author_id).exists():
+        return
+    chunk_size = settings.TIMELINE_CHUNK_SIZE
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .values_list('id', 'pub_date')
+        .iterator(chunk_size=chunk_size))
+    with transaction.atomic():
+        for chunk in _chunks(posts, chunk_size):
+            _bulk_insert(
+                (Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+                 for post_id, pub_date in chunk),
+                chunk_size)
+
+
+def prune_follow(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    Timeline.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id).delete()
+
+
+def rebuild_user_timeline(user_id, chunk_size=None):
+    """Пересобирает ленту пользователя по его текущим подпискам."""
+    chunk_size = chunk_size or settings.TIMELINE_CHUNK_SIZE
+    posts = (
+        Post.objects.filter(author__following__user_id=user_id)
+        .exclude(author__heavy__isnull=False)
+        .values_list('id', 'pub_date')
+        .iterator(chunk_size=chunk_size))
+    with transaction.atomic():
+        Timeline.objects.filter(user_id=user_id).delete()
+        for chunk in _chunks(posts, chunk_size):
+            _bulk_insert(
+                (Timeline(user_id=user_id, post_id=post_id, pub_date=pub_date)
+                 for post_id, pub_date in chunk),
+                chunk_size)
+
+
+def demote_heavy_authors():
+    """Снимает отметку с авторов, опустившихся ниже порога.
+
+    Возвращает число снятых отметок; после этого ленты их подписчиков
+    нужно пересобрать.
+    """
+    demoted = [
+        heavy.pk for heavy in HeavyAuthor.objects.all()
+        if not has_many_followers(heavy.author_id)]
+    HeavyAuthor.objects.filter(pk__in=demoted).delete()
+    return len(demoted)
+
+
+def _post_key(post):
+    return post.pub_date, post.id
+
+
+class FollowFeed:
+    """Лента подписок пользователя одним отсортированным потоком.
+
+    Источники - материализованная лента и посты каждого тяжёлого автора,
+    на которого подписан пользователь; они сливаются k-way merge по
+    ключу (pub_date, id). Поддерживает срезы для Paginator и seek() для
+    CursorPaginator.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def __len__(self):
+        return self.count()
+
+    def count(self):
+        generations = ('posts', 'follows')
+        heavy = self.heavy_author_ids
+        if not heavy:
+            return cached_count(self._timeline(), generations)
+        return (
+            cached_count(
+                self._timeline().exclude(post__author_id__in=heavy),
+                generations)
+            + cached_count(
+                Post.objects.filter(author_id__in=heavy), generations))
+
+    @property
+    def heavy_author_ids(self):
+        if not hasattr(self, '_heavy_author_ids'):
+            followed = Follow.objects.filter(
+                user=self.user).values('author_id')
+            self._heavy_author_ids = list(
+                HeavyAuthor.objects.filter(author_id__in=followed)
+                .values_list('author_id', flat=True))
+        return self._heavy_author_ids
+
+    def _timeline(self):
+        return Timeline.objects.filter(user=self.user)
+
+    def _streams(self, key, backwards, limit):
+        rows = keyset(self._timeline(), key, backwards, id_field='post_id')
+        rows = rows.select_related('post__author', 'post__group')[:limit]
+        yield [row.post for row in rows]
+        for author_id in self.heavy_author_ids:
+            posts = keyset(
+                Post.objects.filter(author_id=author_id), key, backwards)
+            yield list(posts.select_related('author', 'group')[:limit])
+
+    def seek_keys(self, key, backwards, limit):
+        """Как seek(), но отдаёт ключи (pub_date, id), не загружая посты."""
+        streams = [list(
+            keyset(self._timeline(), key, backwards, id_field='post_id')
+            .values_list('pub_date', 'post_id')[:limit])]
+        for author_id in self.heavy_author_ids:
+            streams.append(list(
+                keyset(Post.objects.filter(author_id=author_id), key,
+                       backwards)
+                .values_list('pub_date', 'id')[:limit]))
+        merged = heapq.merge(*streams, reverse=not backwards)
+        # Одинаковые ключи после слияния идут подряд
+        return [row for row, _ in islice(groupby(merged), limit)]
+
+    def seek(self, key, backwards, limit):
+        merged = heapq.merge(
+            *self._streams(key, backwards, limit),
+            key=_post_key, reverse=not backwards)
+        return list(islice(self._unique(merged), limit))
+
+    @staticmethod
+    def _unique(posts):
+        # Пост тяжёлого автора может остаться и в материализованной ленте;
+        # после слияния дубликаты идут подряд
+        last_id = None
+        for post in posts:
+            if post.id != last_id:
+                yield post
+            last_id = post.id
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError('FollowFeed supports only contiguous slices.')
+        start = index.start or 0
+        if index.stop is None:
+            raise TypeError('FollowFeed slices need an upper bound.')
+        if not self.heavy_author_ids:
+            rows = keyset(self._timeline(), None, id_field='post_id')
+            rows = rows.select_related('post__author', 'post__group')
+            return [row.post for row in rows[start:index.stop]]
+        # Глубокая страница: сливаются только ключи, а посты страницы
+        # загружаются одним запросом
+        keys = self.seek_keys(None, False, index.stop)[start:]
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [pk for _, pk in keys])
+        return [posts[pk] for _, pk in keys if pk in posts]
@@ -0,0 +1,95 @@
+"""Проверка и уменьшение загружаемых изображений с ограниченной памятью.
+
+Размер файла и число пикселей проверяются по заголовку, до любого
+декодирования пикселей. Слишком большие оригиналы уменьшаются до
+POST_IMAGE_MAX_SIDE по длинной стороне. Image.draft сразу декодирует
+в уменьшенном виде только JPEG; PNG, GIF и прочие декодируются целиком,
+поэтому память для них ограничивает только проверка пикселей.
+"""
+import math
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+
+def check_size(file):
+    if file.size > settings.POST_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл слишком большой: больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.POST_IMAGE_MAX_BYTES)})
+
+
+def check_pixels(width, height):
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение слишком большое: %(width)s×%(height)s пикселей.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height})
+
+
+def image_size(file):
+    """Ширина и высота изображения по заголовку, без декодирования."""
+    file.seek(0)
+    with Image.open(file) as image:
+        size = image.size
+    file.seek(0)
+    return size
+
+
+def _fit(size, max_side):
+    ratio = max_side / max(size)
+    return tuple(max(1, math.ceil(side * ratio)) for side in size)
+
+
+def downscale(file):
+    """Уменьшает изображение до POST_IMAGE_MAX_SIDE по длинной стороне.
+
+    Возвращает file без изменений, если уменьшать не нужно, иначе новый
+    загруженный файл с тем же именем и форматом. Поворот из EXIF
+    применяется к пикселям, остальные EXIF и цветовой профиль
+    сохраняются.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    file.seek(0)
+    with Image.open(file) as image:
+        if (max(image.size) <= max_side
+                or getattr(image, 'is_animated', False)):
+            return file
+        image_format = image.format
+        target = _fit(image.size, max_side)
+        # JPEG декодируется сразу в 1/2, 1/4 или 1/8 размера
+        image.draft(image.mode, target)
+        image.thumbnail(target)
+        # Иначе снимки с камеры без тега Orientation легли бы на бок
+        resized = ImageOps.exif_transpose(image)
+        options = {}
+        exif = resized.getexif()
+        if exif:
+            options['exif'] = exif.tobytes()
+        if image.info.get('icc_profile'):
+            options['icc_profile'] = image.info['icc_profile']
+        if image_format == 'JPEG':
+            options['quality'] = settings.POST_IMAGE_JPEG_QUALITY
+        buffer = BytesIO()
+        resized.save(buffer, format=image_format, **options)
+    file.close()
+    return SimpleUploadedFile(
+        file.name, buffer.getvalue(), getattr(file, 'content_type', None))
+
+
+def read_image_metadata(file):
+    """Ширина, высота, размер в байтах и формат изображения.
+
+    Pillow читает только заголовок, пиксели не декодируются.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        image_format = image.format or ''
+    file.seek(0)
+    return width, height, file.size, image_format
@@ -1,13 +1,25 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.author_rss,
+        name='author_rss'),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_atom,
+        name='author_atom'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export, name='export'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -25,4 +37,18 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow"
     ),
+    path('api/v1/posts/', api.index, name='api_index'),
+    path(
+        'api/v1/posts/<int:post_id>/',
+        api.post_detail,
+        name='api_post_detail'),
+    path(
+        'api/v1/group/<slug:slug>/',
+        api.group_posts,
+        name='api_group_list'),
+    path(
+        'api/v1/profile/<str:username>/',
+        api.profile,
+        name='api_profile'),
+    path('api/v1/follow/', api.follow_index, name='api_follow_index'),
 ]
@@ -0,0 +1,32 @@
+from django.conf import settings
+
+from .paginators import CachedCountPaginator, CursorPaginator
+
+CURSOR_PARAMS = ('after', 'before')
+
+
+def paginate(request, post_list, generations=('posts',),
+             approximate=False, count=None):
+    """Возвращает страницу ленты для запроса.
+
+    Курсорный режим включается настройкой FEED_PAGINATION = 'cursor'
+    или наличием токена ?after= / ?before= в запросе. В режиме номеров
+    число записей берётся из count (денормализованного счётчика), а без
+    него - из кеша, сбрасываемого по generations.
+    """
+    per_page = settings.MAX_RECORDS_PER_PAGE
+    use_cursor = (
+        settings.FEED_PAGINATION == 'cursor'
+        or any(param in request.GET for param in CURSOR_PARAMS)
+    )
+    if use_cursor:
+        paginator = CursorPaginator(post_list, per_page)
+        return paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'))
+    paginator = CachedCountPaginator(
+        post_list, per_page, generations=generations,
+        approximate=approximate)
+    if count is not None:
+        paginator.count = count
+    return paginator.get_page(request.GET.get('page'))
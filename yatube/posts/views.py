@@ -1,47 +1,96 @@
-from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls.base import reverse
+from django.views.decorators.http import condition
 
+from .cache import (
+    cache_anonymous_page, cached_lookup, feed_fragment, page_etag, tag_page)
+from .counters import get_user_stats
+from .export import CONTENT_TYPES, FORMATS, filename, start_export
 from .forms import PostForm, CommentForm
 from .models import Follow, Group, Post, User
+from .paginators import InvalidCursor
+from .search import decode_search_cursor, search_posts
+from .thumbnails import enqueue_thumbnails
+from .timeline import FollowFeed
+from .utils import paginate
 
 
+def index_etag(request):
+    return page_etag(request, 'feed')
+
+
+def group_etag(request, slug):
+    group_id = cached_lookup('group', slug, lambda: Group.objects.filter(
+        slug=slug).values_list('pk', flat=True).first())
+    if group_id is not None:
+        return page_etag(request, f'group:{group_id}')
+
+
+def profile_etag(request, username):
+    user_id = cached_lookup('user', username, lambda: User.objects.filter(
+        username=username).values_list('pk', flat=True).first())
+    if user_id is not None:
+        return page_etag(request, f'author:{user_id}')
+
+
+def post_etag(request, post_id):
+    author_id = cached_lookup('post', post_id, lambda: Post.objects.filter(
+        pk=post_id).values_list('author_id', flat=True).first())
+    if author_id is not None:
+        return page_etag(request, f'post:{post_id}', f'author:{author_id}')
+
+
+def follow_etag(request):
+    if request.user.is_authenticated:
+        return page_etag(request, 'feed', 'follows')
+
+
+@condition(etag_func=index_etag)
+@cache_anonymous_page
 def index(request):
+    tag_page(request, 'feed')
     post_list = Post.objects.select_related('group', 'author').all()
-    paginator = Paginator(post_list, settings.MAX_RECORDS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, post_list, approximate=True)
     context = {
         'page_obj': page_obj,
         'index': True,
+        'feed_cache': feed_fragment(request, 'feed'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=group_etag)
+@cache_anonymous_page
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    paginator = Paginator(group.posts.all(), settings.MAX_RECORDS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    tag_page(request, f'group:{group.pk}')
+    page_obj = paginate(
+        request, group.posts.select_related('author'),
+        count=group.posts_count)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_cache': feed_fragment(request, f'group:{group.pk}'),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=profile_etag)
+@cache_anonymous_page
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    post_list = Post.objects.filter(author__username=username)
-    paginator = Paginator(post_list, settings.MAX_RECORDS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    tag_page(request, f'author:{user.pk}')
+    stats = get_user_stats(user)
+    post_list = Post.objects.filter(author=user).select_related('group')
+    page_obj = paginate(request, post_list, count=stats.posts_count)
     context = {
         'page_obj': page_obj,
-        'post_count': post_list.count(),
+        'post_count': stats.posts_count,
+        'stats': stats,
         'author': user,
+        'feed_cache': feed_fragment(request, f'author:{user.pk}'),
         'following': Follow.objects.filter(
             user=request.user,
             author=user).exists() if not request.user.is_anonymous else False,
@@ -49,9 +98,13 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@condition(etag_func=post_etag)
+@cache_anonymous_page
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    post_count = Post.objects.filter(author=post.author).count()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id)
+    tag_page(request, f'post:{post.pk}', f'author:{post.author_id}')
+    post_count = get_user_stats(post.author).posts_count
     form = CommentForm(request.POST or None)
 
     if form.is_valid():
@@ -63,12 +116,43 @@ def post_detail(request, post_id):
         'post_count': post_count,
         'post': post,
         'first_thirty': post.text[:30],
-        'comments': post.comments.all(),
+        'comments': post.comments.select_related('author'),
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        after = decode_search_cursor(request.GET.get('after', ''))
+    except InvalidCursor:
+        after = None
+    posts, next_cursor = search_posts(query, after) if query else ([], None)
+    context = {
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@login_required
+def export(request):
+    format = request.GET.get('format')
+    if format not in FORMATS:
+        format = FORMATS[0]
+    chunks = start_export(request.user, format)
+    if chunks is None:
+        return HttpResponse('Выгрузка уже идёт, дождитесь её окончания.',
+                            status=429)
+    response = StreamingHttpResponse(
+        chunks, content_type=CONTENT_TYPES[format])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename(request.user, format)}"')
+    return response
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -77,6 +161,7 @@ def post_create(request):
         create_post = form.save(commit=False)
         create_post.author = request.user
         create_post.save()
+        enqueue_thumbnails(create_post.image)
 
         return redirect('posts:profile', username=request.user.username)
 
@@ -96,7 +181,9 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post)
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            enqueue_thumbnails(post.image)
         return redirect('posts:post_detail', post_id)
 
     context = {
@@ -121,11 +208,9 @@ def add_comment(request, post_id):
 
 
 @login_required
+@condition(etag_func=follow_etag)
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, settings.MAX_RECORDS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, FollowFeed(request.user))
     context = {
         'page_obj': page_obj,
         'follow': True,
@@ -148,6 +148,68 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 USE_TZ = True
 MAX_RECORDS_PER_PAGE = 10
+# 'pages' - нумерованные страницы, 'cursor' - курсоры ?after=/?before=
+FEED_PAGINATION = 'pages'
+# Ширина окна номеров страниц в пагинаторе
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+# Время жизни закешированного числа записей в ленте, секунды
+FEED_COUNT_CACHE_TIMEOUT = 60 * 5
+# Время жизни фрагментов лент; сбрасываются они по поколениям раньше
+FEED_FRAGMENT_CACHE_TIMEOUT = 60 * 10
+# Время жизни страниц, закешированных целиком для анонимных посетителей
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 60 * 10
+# Время жизни соответствий slug/username -> id для ETag страниц
+LOOKUP_CACHE_TIMEOUT = 60 * 60
+# С какого числа строк лента показывает оценку вместо точного COUNT(*)
+FEED_COUNT_APPROXIMATE_ABOVE = 100000
+# Во сколько раз совпадение в комментарии весит меньше, чем в посте,
+# при ранжировании результатов поиска
+SEARCH_COMMENT_WEIGHT = 0.5
+# Размер порции при раскладке постов по лентам подписчиков
+TIMELINE_CHUNK_SIZE = 1000
+# Посты авторов с таким числом подписчиков не раскладываются по лентам,
+# а подмешиваются при чтении follow_index
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000
+# Сколько постов переносится между группами одним UPDATE
+POST_REGROUP_CHUNK_SIZE = 1000
+# Сколько последних постов попадает в RSS/Atom-ленты групп и авторов
+SYNDICATION_ITEMS = 20
+# Наибольший размер страницы JSON API (?limit=)
+API_MAX_LIMIT = 100
+# Сколько строк выгрузки читать из БД за раз
+EXPORT_CHUNK_SIZE = 2000
+# Сколько секунд держится запрет второй одновременной выгрузки
+# пользователя; снимается и раньше, когда выгрузка закончилась
+EXPORT_LOCK_TIMEOUT = 60 * 30
+
+# Миниатюры изображений постов: имя -> (геометрия, параметры sorl-thumbnail)
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+    'card_480': ('480x170', {
+        'crop': 'center', 'upscale': True, 'format': 'WEBP'}),
+    'card_720': ('720x254', {
+        'crop': 'center', 'upscale': True, 'format': 'WEBP'}),
+    'card_960': ('960x339', {
+        'crop': 'center', 'upscale': True, 'format': 'WEBP'}),
+}
+# Варианты миниатюры для srcset; форматы, которые не умеет сохранять
+# установленный Pillow, пропускаются, и остаётся исходная миниатюра
+POST_THUMBNAIL_SRCSET = {
+    'card': ('card_480', 'card_720', 'card_960'),
+}
+POST_THUMBNAIL_SIZES = '(min-width: 992px) 960px, 100vw'
+# Ограничения загружаемых изображений: размер файла, число пикселей и
+# длинная сторона, до которой уменьшается сохраняемый оригинал
+POST_IMAGE_MAX_BYTES = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIDE = 2560
+# Качество JPEG при пересжатии уменьшенного оригинала
+POST_IMAGE_JPEG_QUALITY = 90
+# Потоки, создающие миниатюры в фоне; 0 - создавать сразу при загрузке
+THUMBNAIL_WORKERS = 2
+# Сколько секунд не пытаться снова создать миниатюры после ошибки
+THUMBNAIL_RETRY_DELAY = 60 * 10
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
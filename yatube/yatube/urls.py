@@ -14,11 +14,15 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 # from django.conf import settings
+import os
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import serve_immutable
+
 urlpatterns = [
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
@@ -32,6 +36,11 @@ handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 
 if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL + 'posts/',
+        view=serve_immutable,
+        document_root=os.path.join(settings.MEDIA_ROOT, 'posts'),
+    )
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )